@@ -1,7 +1,20 @@
+import click
 from flask import Flask, render_template
 from flask_jwt_extended import JWTManager
 from config import Config
 from models.database import db
+import migrations
+from services.search import init_search
+from services.catalog_cache import init_catalog_cache
+from services.dashboard import init_dashboard_cache
+from services.identity import init_user_cache, load_user_snapshot
+from services.instrumentation import init_instrumentation
+from services.jobs import init_jobs
+from services.cart import init_carts
+from services.passwords import init_passwords
+from services.rate_limit import init_login_throttle
+from services.engine import configure_engine
+from services.json_provider import init_json
 
 jwt = JWTManager()
 
@@ -9,24 +22,32 @@ jwt = JWTManager()
 from models.user import User
 from models.product import Product, Category
 from models.order import Order, OrderItem, CartItem
+from models.analytics import DailySalesSummary, DailyProductSales
+from models.idempotency import IdempotencyKey
+from models.job import Job
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    init_json(app)
     
     # Initialize extensions
     db.init_app(app)
     jwt.init_app(app)
+    init_catalog_cache(app)
+    init_dashboard_cache(app)
+    init_user_cache(app)
     
     # Configure JWT to handle integer identities
     @jwt.user_identity_loader
     def user_identity_lookup(user):
         return str(user)
     
+    # Resolved once per request from a short-lived cache, not the database
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
         identity = jwt_data["sub"]
-        return User.query.filter_by(id=int(identity)).one_or_none()
+        return load_user_snapshot(identity)
     
     # Import and register blueprints
     from routes.auth import auth_bp
@@ -74,9 +95,84 @@ def create_app():
     def admin_analytics():
         return render_template('admin/analytics.html')
     
-    # Create database tables
+    # Bring the database schema up to date
     with app.app_context():
-        db.create_all()
+        configure_engine(app, db.engine)
+        if app.config.get('AUTO_MIGRATE', True):
+            migrations.upgrade(db.engine, log=app.logger.info)
+        init_search(app)
+        init_instrumentation(app, db.engine)
+    init_jobs(app)
+    init_carts(app)
+    init_passwords(app)
+    init_login_throttle(app)
+    
+    @app.cli.command('db-upgrade')
+    def db_upgrade_command():
+        """Apply pending schema migrations."""
+        migrations.upgrade(db.engine, log=print)
+        with db.engine.connect() as connection:
+            print(f'Database at version {migrations.current_version(connection)}')
+    
+    @app.cli.command('rebuild-sales-rollups')
+    def rebuild_sales_rollups_command():
+        """Recompute the daily sales rollups from existing orders."""
+        from services.sales_rollup import rebuild_sales_rollups
+        rebuild_sales_rollups()
+        print('Sales rollups rebuilt')
+    
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Re-index every product for full-text search."""
+        from services.search import rebuild_search_index, EXTENSION_KEY
+        if app.extensions.get(EXTENSION_KEY) != 'fts5':
+            print('Nothing to rebuild: the search index is maintained by the database')
+            return
+        rebuild_search_index()
+        print('Search index rebuilt')
+    
+    @app.cli.command('purge-idempotency-keys')
+    def purge_idempotency_keys_command():
+        """Delete expired Idempotency-Key responses."""
+        from services.idempotency import purge_expired_keys
+        print(f'Purged {purge_expired_keys()} expired idempotency keys')
+    
+    @app.cli.command('purge-cart-sessions')
+    def purge_cart_sessions_command():
+        """Delete anonymous carts untouched for ANONYMOUS_CART_TTL seconds."""
+        from services.cart import purge_session_carts
+        purged = purge_session_carts(app.config.get('ANONYMOUS_CART_TTL', 2592000))
+        print(f'Purged {purged} lines of abandoned anonymous carts')
+    
+    @app.cli.command('run-jobs')
+    def run_jobs_command():
+        """Run background jobs in the foreground until interrupted."""
+        from services.jobs import job_queue
+        print('Processing jobs; press Ctrl+C to stop')
+        job_queue().work()
+    
+    @app.cli.command('serve')
+    @click.option('--bind', help='host:port to listen on (default SERVER_BIND)')
+    @click.option('--workers', type=int, help='worker processes (default SERVER_WORKERS)')
+    @click.option('--threads', type=int, help='threads per worker (default SERVER_THREADS)')
+    def serve_command(bind, workers, threads):
+        """Run the app under a multi-worker production server."""
+        from services.server import serve
+        workers = workers or app.config['SERVER_WORKERS']
+        if app.config['CART_STORE'] == 'memory' and workers > 1:
+            raise click.UsageError('CART_STORE=memory keeps carts in each worker process; use --workers 1')
+        # This instance has applied the migrations; each worker builds its own app
+        app.extensions['jobs'].stop()
+        if 'cart_flusher' in app.extensions:
+            app.extensions['cart_flusher'].stop()
+        db.engine.dispose()
+        serve(
+            create_app,
+            bind or app.config['SERVER_BIND'],
+            workers,
+            threads or app.config['SERVER_THREADS'],
+            app.config['SERVER_TIMEOUT']
+        )
     
     return app
 
@@ -0,0 +1,389 @@
+"""Latency, queries per request and throughput of the REST API.
+
+Seeds a synthetic store (see :mod:`benchmarks.seed`) and runs two phases
+through the Flask test client:
+
+* endpoint phase: every auth, customer and admin endpoint is called
+  ``--requests`` times in sequence; reports p50/p95/p99 latency and the SQL
+  statements issued per request. Background jobs queued by one request are
+  left to finish before the next is timed, so they don't land in its latency.
+* load phase: ``--workers`` threads, each logged in as its own customer,
+  drive a read-heavy mix for ``--duration`` seconds; reports throughput and
+  latency percentiles.
+
+``--save`` writes the results as JSON and ``--baseline`` compares against a
+saved file, exiting non-zero when an endpoint issues more statements than
+before or its p95 (or the load throughput) is worse than ``--tolerance``:
+    
+    python -m benchmarks.api_benchmark --products 10000 --orders 50000
+    python -m benchmarks.api_benchmark --save benchmarks/baselines/api_sqlite.json
+    python -m benchmarks.api_benchmark --baseline benchmarks/baselines/api_sqlite.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# path and body are formatted/called with the per-request params; setup runs
+# untimed before the request and may add params (e.g. a fresh cart item id)
+Scenario = namedtuple('Scenario', ['name', 'role', 'method', 'path', 'body', 'setup'])
+
+LOAD_MIX = {
+    'customer.get_products': 25,
+    'customer.get_product': 20,
+    'customer.search_products': 10,
+    'customer.get_categories': 8,
+    'customer.get_cart': 10,
+    'customer.add_to_cart': 8,
+    'customer.get_orders': 5,
+    'customer.get_order': 4,
+    'customer.checkout': 2,
+    'auth.get_profile': 3,
+    'admin.get_all_orders': 3,
+    'admin.sales_analytics': 2,
+}
+
+def _add_cart_line(client, headers, params):
+    client.post('/api/customer/cart', headers=headers, json={'product_id': params['product'], 'quantity': 1})
+    items = client.get('/api/customer/cart', headers=headers).get_json()['cart_items']
+    return {'cart_item': next(item['id'] for item in items if item['product_id'] == params['product'])}
+
+def _new_product(client, headers, params):
+    response = client.post('/api/admin/products', headers=headers, json={
+        'name': f"Bench product {params['run']}-{params['n']}", 'price': 1.5,
+        'category_id': params['category'], 'stock_quantity': 10
+    })
+    return {'new_product': response.get_json()['product']['id']}
+
+def scenarios():
+    statuses = ['pending', 'processing', 'shipped', 'delivered', 'cancelled']
+    return [
+        Scenario('auth.register', None, 'POST', '/api/auth/register', lambda p: {
+            'username': f"bench{p['run']}_{p['n']}", 'email': f"bench{p['run']}_{p['n']}@example.com",
+            'password': 'password', 'first_name': 'Bench', 'last_name': 'User'
+        }, None),
+        Scenario('auth.login', None, 'POST', '/api/auth/login',
+                 lambda p: {'username': f"customer{p['customer']}", 'password': 'password'}, None),
+        Scenario('auth.get_profile', 'customer', 'GET', '/api/auth/profile', None, None),
+        Scenario('auth.update_profile', 'customer', 'PUT', '/api/auth/profile',
+                 lambda p: {'address': f"{p['n']} Benchmark Street"}, None),
+        Scenario('customer.get_products', None, 'GET', '/api/customer/products?page={page}', None, None),
+        Scenario('customer.get_products_category', None, 'GET',
+                 '/api/customer/products?category_id={category}', None, None),
+        Scenario('customer.search_products', None, 'GET', '/api/customer/products?search={word}', None, None),
+        Scenario('customer.get_products_cursor', None, 'GET', '/api/customer/products?cursor=&per_page=20', None, None),
+        Scenario('customer.get_product', None, 'GET', '/api/customer/products/{product}', None, None),
+        Scenario('customer.get_categories', None, 'GET', '/api/customer/categories', None, None),
+        Scenario('customer.add_to_cart', 'customer', 'POST', '/api/customer/cart',
+                 lambda p: {'product_id': p['product'], 'quantity': 1}, None),
+        Scenario('customer.get_cart', 'customer', 'GET', '/api/customer/cart', None, None),
+        Scenario('customer.batch_cart', 'customer', 'POST', '/api/customer/cart/batch', lambda p: {
+            'operations': [{'op': 'set', 'product_id': product_id, 'quantity': 1} for product_id in p['basket']]
+        }, None),
+        Scenario('customer.update_cart_item', 'customer', 'PUT', '/api/customer/cart/{cart_item}',
+                 lambda p: {'quantity': 2}, _add_cart_line),
+        Scenario('customer.remove_from_cart', 'customer', 'DELETE', '/api/customer/cart/{cart_item}',
+                 None, _add_cart_line),
+        Scenario('customer.checkout', 'customer', 'POST', '/api/customer/checkout',
+                 lambda p: {'shipping_address': 'Benchmark'}, _add_cart_line),
+        Scenario('customer.get_orders', 'customer', 'GET', '/api/customer/orders', None, None),
+        Scenario('customer.get_order', 'customer', 'GET', '/api/customer/orders/{own_order}', None, None),
+        Scenario('admin.get_all_products', 'admin', 'GET', '/api/admin/products?page={page}', None, None),
+        Scenario('admin.create_product', 'admin', 'POST', '/api/admin/products', lambda p: {
+            'name': f"Bench product {p['run']}-{p['n']}", 'price': 2.5,
+            'category_id': p['category'], 'stock_quantity': 10
+        }, None),
+        Scenario('admin.update_product', 'admin', 'PUT', '/api/admin/products/{product}',
+                 lambda p: {'description': f"Updated {p['n']}"}, None),
+        Scenario('admin.delete_product', 'admin', 'DELETE', '/api/admin/products/{new_product}',
+                 None, _new_product),
+        Scenario('admin.adjust_products', 'admin', 'POST', '/api/admin/products/adjustments', lambda p: {
+            'adjustments': [{'product_id': product_id, 'stock_delta': 5} for product_id in p['restock']]
+            + [{'product_id': p['product'], 'price': 2.75}]
+        }, None),
+        Scenario('admin.dashboard', 'admin', 'GET', '/api/admin/dashboard', None, None),
+        Scenario('admin.inventory', 'admin', 'GET', '/api/admin/inventory', None, None),
+        Scenario('admin.get_all_categories', 'admin', 'GET', '/api/admin/categories', None, None),
+        Scenario('admin.create_category', 'admin', 'POST', '/api/admin/categories',
+                 lambda p: {'name': f"Bench category {p['run']}-{p['n']}"}, None),
+        Scenario('admin.update_category', 'admin', 'PUT', '/api/admin/categories/{category}',
+                 lambda p: {'description': f"Updated {p['n']}"}, None),
+        Scenario('admin.get_all_orders', 'admin', 'GET', '/api/admin/orders?page={page}', None, None),
+        Scenario('admin.get_all_orders_status', 'admin', 'GET', '/api/admin/orders?status=pending', None, None),
+        Scenario('admin.get_order', 'admin', 'GET', '/api/admin/orders/{order}', None, None),
+        Scenario('admin.update_order_status', 'admin', 'PUT', '/api/admin/orders/{order}/status',
+                 lambda p: {'status': statuses[p['n'] % len(statuses)]}, None),
+        Scenario('admin.sales_analytics', 'admin', 'GET', '/api/admin/analytics/sales', None, None),
+        Scenario('admin.category_sales', 'admin', 'GET', '/api/admin/analytics/sales/categories', None, None),
+        Scenario('admin.daily_sales', 'admin', 'GET', '/api/admin/analytics/sales/daily', None, None),
+        Scenario('admin.cache_stats', 'admin', 'GET', '/api/admin/cache/stats', None, None),
+        Scenario('admin.get_all_users', 'admin', 'GET', '/api/admin/users?page={page}', None, None),
+    ]
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values`` (milliseconds)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def summarize(timings):
+    return {
+        'p50': round(percentile(timings, 50), 3),
+        'p95': round(percentile(timings, 95), 3),
+        'p99': round(percentile(timings, 99), 3)
+    }
+
+class Driver:
+    """Issues scenario requests and counts the SQL statements each one runs."""
+    
+    def __init__(self, app, engine, tokens, store, run):
+        from sqlalchemy import event
+        self.app = app
+        self.tokens = tokens
+        self.store = store
+        self.run = run
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._count)
+    
+    def _count(self, *args):
+        self._local.statements = getattr(self._local, 'statements', 0) + 1
+    
+    def params(self, n, customer):
+        store = self.store
+        return {
+            'n': n,
+            'run': self.run,
+            'customer': customer,
+            'page': 1 + n % 5,
+            'word': store['words'][n % len(store['words'])],
+            'category': 1 + n % store['categories'],
+            'product': store['purchasable'][n % len(store['purchasable'])],
+            'restock': store['purchasable'][:200],
+            'basket': [store['purchasable'][(n + i) % len(store['purchasable'])] for i in range(10)],
+            'order': 1 + n % store['orders'],
+            'own_order': customer - 1
+        }
+    
+    def settle(self, timeout=2.0):
+        """Wait until the job workers have run every job that is due."""
+        from datetime import datetime
+        from models.database import db
+        from models.job import Job
+        queue = self.app.extensions.get('jobs')
+        if queue is None or not queue.workers:
+            return
+        deadline = time.perf_counter() + timeout
+        with self.app.app_context():
+            while time.perf_counter() < deadline:
+                pending = db.session.query(Job.id).filter(
+                    Job.status.in_(('queued', 'running')), Job.run_at <= datetime.utcnow()
+                ).first()
+                db.session.rollback()
+                if pending is None:
+                    return
+                time.sleep(0.001)
+    
+    def call(self, client, scenario, n, customer, settle=False):
+        """Return ``(status_code, milliseconds, statements)`` for one request."""
+        params = self.params(n, customer)
+        role = scenario.role
+        headers = {'Authorization': f'Bearer {self.tokens[customer if role == "customer" else 1]}'} if role else {}
+        if scenario.setup:
+            params.update(scenario.setup(client, headers, params))
+        body = scenario.body(params) if scenario.body else None
+        if settle:
+            self.settle()
+        
+        self._local.statements = 0
+        started = time.perf_counter()
+        response = client.open(scenario.path.format(**params), method=scenario.method, headers=headers, json=body)
+        elapsed = (time.perf_counter() - started) * 1000
+        return response.status_code, elapsed, self._local.statements
+
+def endpoint_phase(driver, requests, warmup):
+    client = driver.app.test_client()
+    customers = driver.store['customers']
+    results = {}
+    print(f"{'endpoint':<34}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'errors':>8}")
+    for scenario in scenarios():
+        timings, statements, errors = [], [], 0
+        for n in range(warmup + requests):
+            status, elapsed, count = driver.call(client, scenario, n, customers[n % len(customers)], settle=True)
+            if n < warmup:
+                continue
+            timings.append(elapsed)
+            statements.append(count)
+            errors += status >= 400
+        result = summarize(timings)
+        result['queries'] = max(statements)
+        result['errors'] = errors
+        results[scenario.name] = result
+        print(f"{scenario.name:<34}{result['p50']:>9.2f}{result['p95']:>9.2f}{result['p99']:>9.2f}"
+              f"{result['queries']:>9}{errors:>8}")
+    return results
+
+def load_phase(driver, workers, duration, seed):
+    by_name = {scenario.name: scenario for scenario in scenarios()}
+    names = list(LOAD_MIX)
+    weights = [LOAD_MIX[name] for name in names]
+    customers = driver.store['customers']
+    timings, lock = [], threading.Lock()
+    errors = [0]
+    deadline = time.perf_counter() + duration
+    
+    def worker(index):
+        rng = random.Random(seed + index)
+        client = driver.app.test_client()
+        customer = customers[index % len(customers)]
+        local_timings, local_errors, n = [], 0, 0
+        while time.perf_counter() < deadline:
+            scenario = by_name[rng.choices(names, weights)[0]]
+            status, elapsed, _ = driver.call(client, scenario, rng.randrange(1 << 30), customer)
+            local_timings.append(elapsed)
+            local_errors += status >= 400
+            n += 1
+        with lock:
+            timings.extend(local_timings)
+            errors[0] += local_errors
+    
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    result = summarize(timings)
+    result['requests'] = len(timings)
+    result['throughput'] = round(len(timings) / elapsed, 1)
+    result['errors'] = errors[0]
+    print(f"\nload: {workers} workers, {duration}s: {result['requests']} requests, "
+          f"{result['throughput']} req/s, p50 {result['p50']:.2f} ms, p95 {result['p95']:.2f} ms, "
+          f"p99 {result['p99']:.2f} ms, {result['errors']} errors")
+    return result
+
+def compare(results, baseline, tolerance, noise_ms):
+    """Print regressions against ``baseline`` and return how many were found.
+    
+    A scenario that only one side measured counts as a regression too, so a
+    baseline that has fallen behind the scenario list fails the run.
+    """
+    regressions = []
+    base_endpoints = baseline.get('endpoints', {})
+    for name in results['endpoints']:
+        if name not in base_endpoints:
+            regressions.append(f'{name}: not in the baseline; refresh it with --save')
+    for name, base in base_endpoints.items():
+        current = results['endpoints'].get(name)
+        if current is None:
+            regressions.append(f'{name}: in the baseline but not measured')
+            continue
+        if current['queries'] > base['queries']:
+            regressions.append(f"{name}: {current['queries']} queries per request (baseline {base['queries']})")
+        if current['p95'] > base['p95'] * (1 + tolerance) and current['p95'] - base['p95'] > noise_ms:
+            regressions.append(f"{name}: p95 {current['p95']:.2f} ms (baseline {base['p95']:.2f} ms)")
+    base_load, load = baseline.get('load'), results.get('load')
+    if base_load and load and load['throughput'] < base_load['throughput'] * (1 - tolerance):
+        regressions.append(f"load: {load['throughput']} req/s (baseline {base_load['throughput']} req/s)")
+    
+    print()
+    for line in regressions:
+        print(f'REGRESSION {line}')
+    print(f'{len(regressions)} regressions against baseline' if regressions else 'No regressions against baseline')
+    return len(regressions)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--categories', type=int, default=20)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--items-per-order', type=int, default=3)
+    parser.add_argument('--requests', type=int, default=50, help='timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=8, help='load phase threads (0 skips the phase)')
+    parser.add_argument('--duration', type=float, default=10, help='load phase seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-cache', action='store_true', help='disable the catalog and user caches')
+    parser.add_argument('--use-env-database', action='store_true',
+                        help='seed the (empty) database in DATABASE_URL instead of a SQLite file')
+    parser.add_argument('--save', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against a JSON file written by --save')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed p95/throughput change')
+    parser.add_argument('--noise-ms', type=float, default=2, help='ignore p95 changes smaller than this')
+    args = parser.parse_args()
+    
+    if not args.use_env_database:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'api_bench.db')
+    if args.no_cache:
+        os.environ['CATALOG_CACHE_SIZE'] = os.environ['USER_CACHE_SIZE'] = '0'
+    
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from models.database import db
+    from models.product import Product
+    from benchmarks.seed import seed_store, WORDS
+    
+    app = create_app()
+    with app.app_context():
+        if Product.query.first() is not None:
+            parser.error('the target database already has products; --use-env-database needs an empty one')
+        started = time.perf_counter()
+        counts = seed_store(db, users=args.users, categories=args.categories, products=args.products,
+                            orders=args.orders, items_per_order=args.items_per_order, seed=args.seed)
+        print(f"seeded {', '.join(f'{count} {name}' for name, count in counts.items())} "
+              f'in {time.perf_counter() - started:.1f}s ({db.engine.dialect.name})\n')
+        
+        purchasable = [
+            product_id for product_id, in db.session.query(Product.id).filter(
+                Product.is_active == True, Product.stock_quantity >= 100
+            ).order_by(Product.id)
+        ]
+        customers = list(range(2, min(args.users, args.orders + 1) + 1))
+        tokens = {user_id: create_access_token(identity=str(user_id)) for user_id in [1] + customers}
+        store = {
+            'categories': args.categories, 'orders': args.orders, 'customers': customers,
+            'purchasable': purchasable, 'words': WORDS
+        }
+        engine = db.engine
+    
+    driver = Driver(app, engine, tokens, store, run=int(time.time()))
+    results = {
+        'meta': {
+            'dialect': engine.dialect.name,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'seed': counts,
+            'requests': args.requests,
+            'workers': args.workers,
+            'duration': args.duration,
+            'cache': not args.no_cache
+        },
+        'endpoints': endpoint_phase(driver, args.requests, args.warmup)
+    }
+    if args.workers > 0:
+        results['load'] = load_phase(driver, args.workers, args.duration, args.seed)
+    
+    if args.save:
+        with open(args.save, 'w') as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+            handle.write('\n')
+        print(f'\nsaved results to {args.save}')
+    if args.baseline:
+        with open(args.baseline) as handle:
+            return 1 if compare(results, json.load(handle), args.tolerance, args.noise_ms) else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Statement count and latency of the cart view by cart size.
+
+For each size the customer's cart is grown through the batch cart endpoint
+and ``GET /api/customer/cart`` is timed while counting the SQL statements it
+issues. The view is built from one query whatever the cart holds, so the
+command exits non-zero when the count is not the same at every size:
+    
+    python -m benchmarks.cart_benchmark --sizes 1,10,50,200 --store memory
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1,10,50,200')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--store', choices=['database', 'memory'], default='database',
+                        help='CART_STORE to measure')
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'cart_bench.db')
+    os.environ['CART_STORE'] = args.store
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event, insert
+    from app import create_app
+    from models.database import db
+    from models.product import Product, Category
+    from models.user import User
+    from services.cart import MAX_OPERATIONS
+    
+    app = create_app()
+    with app.app_context():
+        db.session.add(Category(name='Benchmark'))
+        db.session.add(User(username='bench', email='bench@example.com', first_name='Bench',
+                            last_name='User', password_hash='!'))
+        db.session.execute(insert(Product), [
+            {'name': f'Item {i}', 'price': 1 + i % 20, 'category_id': 1,
+             'stock_quantity': 1000, 'is_active': True}
+            for i in range(max(sizes))
+        ])
+        db.session.commit()
+        token = create_access_token(identity='1')
+        engine = db.engine
+    
+    statements = [0]
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.__setitem__(0, statements[0] + 1))
+    
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    counts = set()
+    print(f"{'cart lines':>10}{'statements':>12}{'p50 ms':>10}{'max ms':>10}")
+    lines = 0
+    for size in sizes:
+        for start in range(lines, size, MAX_OPERATIONS):
+            response = client.post('/api/customer/cart/batch', headers=headers, json={'operations': [
+                {'op': 'set', 'product_id': product_id, 'quantity': 2}
+                for product_id in range(start + 1, min(start + MAX_OPERATIONS, size) + 1)
+            ]})
+            assert response.status_code == 200, response.get_json()
+        lines = size
+        # Untimed first view, which loads the cart into the memory store
+        client.get('/api/customer/cart', headers=headers)
+        
+        run_counts, timings = [], []
+        for _ in range(args.repeat):
+            statements[0] = 0
+            started = time.perf_counter()
+            response = client.get('/api/customer/cart', headers=headers)
+            timings.append((time.perf_counter() - started) * 1000)
+            run_counts.append(statements[0])
+            assert response.status_code == 200, response.get_json()
+            assert len(response.get_json()['cart_items']) == size
+        counts.add(max(run_counts))
+        print(f'{size:>10}{max(run_counts):>12}{statistics.median(timings):>10.2f}{max(timings):>10.2f}')
+    
+    if len(counts) > 1:
+        print(f'The cart view statement count changes with the cart size ({sorted(counts)})')
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
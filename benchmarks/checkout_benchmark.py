@@ -0,0 +1,75 @@
+"""Statement count and latency of checkout by cart size.
+
+For each cart size the cart is refilled directly in the database and the
+checkout endpoint is timed while counting the SQL statements it issues:
+    
+    python -m benchmarks.checkout_benchmark --sizes 1,10,50,100,200 --repeat 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1,10,50,100,200')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'checkout_bench.db')
+    # Only the statements of the request itself; no background job workers
+    os.environ['JOB_WORKERS'] = '0'
+    # Carts are refilled directly in cart_items between checkouts
+    os.environ['CART_STORE'] = 'database'
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event, insert
+    from app import create_app
+    from models.database import db
+    from models.product import Product, Category
+    from models.order import CartItem
+    from models.user import User
+    
+    app = create_app()
+    with app.app_context():
+        db.session.add(Category(name='Benchmark'))
+        db.session.add(User(username='bench', email='bench@example.com', first_name='Bench',
+                            last_name='User', password_hash='!'))
+        db.session.execute(insert(Product), [
+            {'name': f'Item {i}', 'price': 1 + i % 20, 'category_id': 1,
+             'stock_quantity': 1000000, 'is_active': True}
+            for i in range(max(sizes))
+        ])
+        db.session.commit()
+        token = create_access_token(identity='1')
+        engine = db.engine
+    
+    statements = [0]
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.__setitem__(0, statements[0] + 1))
+    
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    print(f"{'cart lines':>10}{'statements':>12}{'p50 ms':>10}{'max ms':>10}")
+    for size in sizes:
+        counts, timings = [], []
+        for _ in range(args.repeat):
+            with app.app_context():
+                db.session.execute(insert(CartItem), [
+                    {'user_id': 1, 'product_id': product_id, 'quantity': 2}
+                    for product_id in range(1, size + 1)
+                ])
+                db.session.commit()
+            statements[0] = 0
+            started = time.perf_counter()
+            response = client.post('/api/customer/checkout', json={'shipping_address': 'Bench'}, headers=headers)
+            timings.append((time.perf_counter() - started) * 1000)
+            counts.append(statements[0])
+            assert response.status_code == 201, response.get_json()
+        print(f'{size:>10}{max(counts):>12}{statistics.median(timings):>10.2f}{max(timings):>10.2f}')
+
+if __name__ == '__main__':
+    main()
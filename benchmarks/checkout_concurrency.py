@@ -0,0 +1,78 @@
+"""Stress checkout with many parallel buyers of one hot product.
+
+Every simulated customer puts the same product in their cart and checks out
+concurrently. The run reports throughput and verifies that the number of
+units sold never exceeds the starting stock:
+    
+    python -m benchmarks.checkout_concurrency --customers 200 --stock 50 --threads 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--customers', type=int, default=200)
+    parser.add_argument('--stock', type=int, default=50)
+    parser.add_argument('--quantity', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+    
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'checkout_bench.db')
+    from config import Config
+    # Let writers queue on SQLite's lock instead of failing fast
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+    
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from models.database import db
+    from models.product import Product, Category
+    from models.user import User
+    
+    app = create_app()
+    with app.app_context():
+        db.session.add(Category(name='Benchmark'))
+        db.session.add(Product(name='Hot item', price=1, category_id=1, stock_quantity=args.stock))
+        db.session.add_all(
+            User(username=f'bench{i}', email=f'bench{i}@example.com', first_name='Bench',
+                 last_name='User', password_hash='!')
+            for i in range(args.customers)
+        )
+        db.session.commit()
+        tokens = [create_access_token(identity=str(i + 1)) for i in range(args.customers)]
+    
+    def buy(token):
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {token}'}
+        added = client.post('/api/customer/cart', json={'product_id': 1, 'quantity': args.quantity}, headers=headers)
+        if added.status_code != 200:
+            return 'cart_rejected'
+        response = client.post('/api/customer/checkout', json={'shipping_address': 'Bench'}, headers=headers)
+        return {201: 'ordered', 400: 'out_of_stock'}.get(response.status_code, f'error_{response.status_code}')
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        outcomes = Counter(pool.map(buy, tokens))
+    elapsed = time.perf_counter() - started
+    
+    with app.app_context():
+        remaining = db.session.get(Product, 1).stock_quantity
+        from models.order import OrderItem
+        sold = db.session.query(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)).scalar()
+    
+    print(f'customers={args.customers} threads={args.threads} stock={args.stock}')
+    print(f'outcomes: {dict(outcomes)}')
+    print(f'elapsed {elapsed:.2f}s, {args.customers / elapsed:.1f} checkouts/s')
+    print(f'sold {sold} units, {remaining} left in stock')
+    oversold = sold > args.stock or remaining < 0 or sold + remaining != args.stock
+    print('OVERSOLD' if oversold else 'no oversell')
+    return 1 if oversold else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Fail if a hot endpoint's SQL falls back to a full table scan.
+
+Drives the cart, order and catalog endpoints against a seeded database,
+captures every SELECT/UPDATE/DELETE they issue and runs EXPLAIN on it. A plan
+step that scans a whole table is reported as a violation, except ordered
+scans that a LIMIT cuts short (keyset and first-page reads) and the
+index-only scan behind an unfiltered page-mode ``total`` (clients avoid it
+with ``include_total=false`` or cursor paging). Exits non-zero when any
+violation is found:
+    
+    python -m benchmarks.explain_queries            # throwaway SQLite database
+    DATABASE_URL=mysql+pymysql://... python -m benchmarks.explain_queries --use-env-database
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+EXPLAINED = re.compile(r'^\s*(SELECT|UPDATE|DELETE)\b', re.IGNORECASE)
+HAS_LIMIT = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+IS_COUNT = re.compile(r'^\s*SELECT\s+count\(\*\)', re.IGNORECASE)
+
+def endpoint_calls(admin, customer):
+    """(label, method, url, headers, json) for every checked endpoint."""
+    return [
+        ('get_products', 'GET', '/api/customer/products', {}, None),
+        ('get_products category', 'GET', '/api/customer/products?category_id=2', {}, None),
+        ('get_products search', 'GET', '/api/customer/products?search=apple', {}, None),
+        ('get_products cursor', 'GET', '/api/customer/products?cursor=&per_page=5', {}, None),
+        ('get_product', 'GET', '/api/customer/products/3', {}, None),
+        ('add_to_cart', 'POST', '/api/customer/cart', customer, {'product_id': 3, 'quantity': 1}),
+        ('get_cart', 'GET', '/api/customer/cart', customer, None),
+        ('checkout', 'POST', '/api/customer/checkout', customer, {'shipping_address': 'Plan check'}),
+        ('get_orders', 'GET', '/api/customer/orders', customer, None),
+        ('get_order', 'GET', '/api/customer/orders/2', customer, None),
+        ('get_all_orders', 'GET', '/api/admin/orders', admin, None),
+        ('get_all_orders status', 'GET', '/api/admin/orders?status=pending', admin, None),
+        ('get_all_orders cursor', 'GET', '/api/admin/orders?cursor=&per_page=5', admin, None),
+        ('get_all_products', 'GET', '/api/admin/products?category_id=1', admin, None),
+        ('inventory', 'GET', '/api/admin/inventory', admin, None),
+    ]
+
+def sqlite_violations(connection, statement, params):
+    rows = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, params).fetchall()
+    details = [row[-1] for row in rows]
+    sorts = any('TEMP B-TREE' in detail for detail in details)
+    bad = []
+    for detail in details:
+        if not detail.startswith('SCAN ') or 'VIRTUAL TABLE' in detail:
+            continue
+        if HAS_LIMIT.search(statement) and not sorts:
+            continue
+        if IS_COUNT.match(statement) and 'COVERING INDEX' in detail:
+            continue
+        bad.append(detail)
+    return details, bad
+
+def mysql_violations(connection, statement, params):
+    result = connection.exec_driver_sql('EXPLAIN ' + statement, params)
+    rows = [dict(zip(result.keys(), row)) for row in result]
+    sorts = any('filesort' in (row.get('Extra') or '') for row in rows)
+    details = [f"{row.get('table')}: type={row.get('type')} key={row.get('key')}" for row in rows]
+    bad = [
+        detail for row, detail in zip(rows, details)
+        if row.get('type') in ('ALL', 'index')
+        and not (HAS_LIMIT.search(statement) and not sorts)
+        and not (IS_COUNT.match(statement) and row.get('type') == 'index')
+    ]
+    return details, bad
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--use-env-database', action='store_true',
+                        help='check the database in DATABASE_URL instead of a seeded SQLite file')
+    parser.add_argument('--verbose', action='store_true', help='print every plan')
+    args = parser.parse_args()
+    
+    if not args.use_env_database:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'plans.db')
+    
+    # Only the statements of the request itself; no background job workers
+    os.environ['JOB_WORKERS'] = '0'
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+    from app import create_app
+    from models.database import db
+    from benchmarks.seed import seed_store
+    
+    app = create_app()
+    with app.app_context():
+        if not args.use_env_database:
+            seed_store(db, users=2, categories=5, products=500, orders=200)
+        engine = db.engine
+        admin = {'Authorization': 'Bearer ' + create_access_token(identity='1')}
+        customer = {'Authorization': 'Bearer ' + create_access_token(identity='2')}
+    
+    captured = []
+    
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if EXPLAINED.match(statement):
+            captured.append((statement, parameters[0] if executemany else parameters))
+    
+    explain = sqlite_violations if engine.dialect.name == 'sqlite' else mysql_violations
+    client = app.test_client()
+    failures = 0
+    for label, method, url, headers, body in endpoint_calls(admin, customer):
+        captured.clear()
+        event.listen(engine, 'before_cursor_execute', capture)
+        try:
+            response = client.open(url, method=method, headers=headers, json=body)
+        finally:
+            event.remove(engine, 'before_cursor_execute', capture)
+        if response.status_code >= 400:
+            print(f'!! {label}: HTTP {response.status_code} {response.get_data(as_text=True)[:200]}')
+            failures += 1
+            continue
+        
+        with engine.connect() as connection:
+            for statement, params in captured:
+                details, bad = explain(connection, statement, params)
+                if bad or args.verbose:
+                    print(f"{'FULL SCAN' if bad else 'ok'} [{label}] {' '.join(statement.split())[:160]}")
+                    for detail in details:
+                        print(f"    {'!! ' if detail in bad else ''}{detail}")
+                failures += bool(bad)
+        print(f'{label:<24} {len(captured):>3} statements checked')
+    
+    print('FAILED: full table scans found' if failures else 'All hot-path queries use indexes')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
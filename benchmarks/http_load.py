@@ -0,0 +1,119 @@
+"""HTTP load generator for comparing servers (dev server vs ``flask serve``).
+
+Runs ``--processes`` client processes with ``--concurrency`` threads each
+against a running server for ``--duration`` seconds, spread over the public
+catalog endpoints and a customer's cart and orders, and reports throughput
+and latency percentiles. Seed the server's database with
+``python -m benchmarks.seed`` first:
+    
+    python -m benchmarks.http_load --url http://127.0.0.1:5000 --concurrency 16
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.api_benchmark import summarize
+
+PATHS = [
+    ('/api/customer/products?page={page}', False, 30),
+    ('/api/customer/products/{product}', False, 30),
+    ('/api/customer/categories', False, 10),
+    ('/api/customer/products?search=apple', False, 10),
+    ('/api/customer/cart', True, 10),
+    ('/api/customer/orders', True, 10),
+]
+
+def _login(url, username, password):
+    parts = urlsplit(url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    connection.request('POST', '/api/auth/login', json.dumps({'username': username, 'password': password}),
+                       {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    body = json.loads(response.read())
+    if response.status != 200:
+        raise SystemExit(f'login failed: {body}')
+    return body['access_token']
+
+def _client_process(url, token, concurrency, duration, products, seed, results):
+    parts = urlsplit(url)
+    deadline = time.perf_counter() + duration
+    timings, errors, lock = [], [0], threading.Lock()
+    choices = [(path, auth) for path, auth, _ in PATHS]
+    weights = [weight for _, _, weight in PATHS]
+    
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            path, auth = rng.choices(choices, weights)[0]
+            path = path.format(page=rng.randint(1, 5), product=rng.randint(1, products))
+            headers = {'Authorization': f'Bearer {token}'} if auth else {}
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                failed += response.status >= 500
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            timings.extend(local)
+            errors[0] += failed
+    
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((timings, errors[0]))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--processes', type=int, default=2, help='client processes')
+    parser.add_argument('--concurrency', type=int, default=8, help='connections per client process')
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--products', type=int, default=5000, help='product ids to spread detail requests over')
+    parser.add_argument('--username', default='customer2')
+    parser.add_argument('--password', default='password')
+    args = parser.parse_args()
+    
+    token = _login(args.url, args.username, args.password)
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=_client_process, args=(
+            args.url, token, args.concurrency, args.duration, args.products, index, results
+        ))
+        for index in range(args.processes)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    timings, errors = [], 0
+    for _ in processes:
+        chunk, failed = results.get()
+        timings.extend(chunk)
+        errors += failed
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+    
+    result = summarize(timings)
+    print(f'{args.url}: {len(timings)} requests in {elapsed:.1f}s = {len(timings) / elapsed:.1f} req/s, '
+          f"p50 {result['p50']:.2f} ms, p95 {result['p95']:.2f} ms, p99 {result['p99']:.2f} ms, {errors} errors")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Bulk catalog import/export against one-product-per-request creation.
+
+Generates a supplier catalog, times ``POST /api/admin/products/import`` on
+it (CSV, then the same rows updated), extrapolates ``POST
+/api/admin/products`` from a sample, and times the streaming export:
+    
+    python -m benchmarks.import_benchmark --rows 20000 --sample 500
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _catalog(rows, categories, rng, with_ids=False):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['id', 'name', 'description', 'price', 'category_id', 'stock_quantity'])
+    for i in range(rows):
+        writer.writerow([
+            i + 1 if with_ids else '', f'SKU {i:06d}', f'Supplier item {i}',
+            f'{rng.uniform(0.5, 50):.2f}', rng.randint(1, categories), rng.randint(0, 500)
+        ])
+    return buffer.getvalue().encode()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--sample', type=int, default=500, help='single-product creates to time')
+    parser.add_argument('--categories', type=int, default=20)
+    args = parser.parse_args()
+    
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'import_bench.db')
+    os.environ['JOB_WORKERS'] = '0'
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+    from app import create_app
+    from models.database import db
+    from models.product import Category
+    from models.user import User
+    
+    app = create_app()
+    with app.app_context():
+        db.session.add(User(username='admin', email='admin@example.com', first_name='Admin',
+                            last_name='User', password_hash='!', is_admin=True))
+        db.session.add_all(Category(name=f'Category {i}') for i in range(args.categories))
+        db.session.commit()
+        token = create_access_token(identity='1')
+        engine = db.engine
+    
+    statements = [0]
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.__setitem__(0, statements[0] + 1))
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    rng = random.Random(0)
+    
+    def timed(label, rows, call):
+        statements[0] = 0
+        started = time.perf_counter()
+        response = call()
+        elapsed = time.perf_counter() - started
+        print(f'{label:<28}{rows:>8}{elapsed:>10.2f}{rows / elapsed:>12.0f}{statements[0]:>12}')
+        return response
+    
+    print(f"{'':<28}{'rows':>8}{'seconds':>10}{'rows/s':>12}{'statements':>12}")
+    for label, body in (
+        ('import csv (create)', _catalog(args.rows, args.categories, rng)),
+        ('import csv (update)', _catalog(args.rows, args.categories, rng, with_ids=True))
+    ):
+        response = timed(label, args.rows, lambda: client.post(
+            '/api/admin/products/import', data=body, content_type='text/csv', headers=headers
+        ))
+        summary = response.get_json()
+        assert summary['failed'] == 0 and summary['created'] + summary['updated'] == args.rows, summary
+    
+    def single_creates():
+        for i in range(args.sample):
+            response = client.post('/api/admin/products', headers=headers, json={
+                'name': f'Single {i}', 'price': 1.25, 'category_id': 1 + i % args.categories
+            })
+            assert response.status_code == 201, response.get_json()
+    timed('POST /products (sample)', args.sample, single_creates)
+    
+    for fmt in ('csv', 'jsonl'):
+        # Reading the body drives the streamed export
+        body = timed(f'export {fmt}', args.rows + args.sample, lambda: client.get(
+            f'/api/admin/products/export?format={fmt}', headers=headers
+        ).get_data())
+        print(f'{"":<28}{len(body):>8} bytes')
+
+if __name__ == '__main__':
+    main()
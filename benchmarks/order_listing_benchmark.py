@@ -0,0 +1,104 @@
+"""Statement count and latency of the order listings by number of orders.
+
+For each size the customer's order history is topped up directly in the
+database and the customer and admin order listings are timed while counting
+the SQL statements they issue. Loading order items or products per order
+would make the count grow with the size, so the command exits non-zero when
+an endpoint's count is not the same at every size:
+    
+    python -m benchmarks.order_listing_benchmark --sizes 1,10,50,200 --items-per-order 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ENDPOINTS = [
+    ('customer.get_orders', '/api/customer/orders'),
+    ('admin.get_all_orders', '/api/admin/orders?per_page=100'),
+]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1,10,50,200')
+    parser.add_argument('--items-per-order', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    sizes = sorted(int(size) for size in args.sizes.split(','))
+    
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'order_listing_bench.db')
+    # Only the statements of the request itself; no background job workers
+    os.environ['JOB_WORKERS'] = '0'
+    from datetime import datetime, timedelta
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event, insert
+    from app import create_app
+    from models.database import db
+    from models.product import Product, Category
+    from models.order import Order, OrderItem
+    from models.user import User
+    
+    app = create_app()
+    with app.app_context():
+        db.session.add(Category(name='Benchmark'))
+        db.session.add(User(username='bench', email='bench@example.com', first_name='Bench',
+                            last_name='User', password_hash='!', is_admin=True))
+        db.session.execute(insert(Product), [
+            {'name': f'Item {i}', 'price': 1 + i % 20, 'category_id': 1,
+             'stock_quantity': 1000, 'is_active': True}
+            for i in range(args.items_per_order)
+        ])
+        db.session.commit()
+        token = create_access_token(identity='1')
+        engine = db.engine
+    
+    statements = [0]
+    event.listen(engine, 'before_cursor_execute', lambda *a: statements.__setitem__(0, statements[0] + 1))
+    
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    # Untimed first call so the user lookup behind the admin check is cached
+    client.get(ENDPOINTS[0][1], headers=headers)
+    
+    counts = {name: set() for name, _ in ENDPOINTS}
+    print(f"{'endpoint':<24}{'orders':>8}{'statements':>12}{'p50 ms':>10}{'max ms':>10}")
+    orders = 0
+    for size in sizes:
+        with app.app_context():
+            now = datetime.utcnow()
+            for n in range(orders, size):
+                order_id = db.session.execute(insert(Order).values(
+                    user_id=1, total_amount=2 * args.items_per_order, status='pending',
+                    shipping_address='Bench', created_at=now - timedelta(minutes=n)
+                )).inserted_primary_key[0]
+                db.session.execute(insert(OrderItem), [
+                    {'order_id': order_id, 'product_id': product_id, 'quantity': 1, 'price': 2}
+                    for product_id in range(1, args.items_per_order + 1)
+                ])
+            db.session.commit()
+        orders = size
+        
+        for name, path in ENDPOINTS:
+            run_counts, timings = [], []
+            for _ in range(args.repeat):
+                statements[0] = 0
+                started = time.perf_counter()
+                response = client.get(path, headers=headers)
+                timings.append((time.perf_counter() - started) * 1000)
+                run_counts.append(statements[0])
+                assert response.status_code == 200, response.get_json()
+            counts[name].add(max(run_counts))
+            print(f'{name:<24}{size:>8}{max(run_counts):>12}'
+                  f'{statistics.median(timings):>10.2f}{max(timings):>10.2f}')
+    
+    growing = [name for name, seen in counts.items() if len(seen) > 1]
+    for name in growing:
+        print(f'{name}: statement count changes with the number of orders ({sorted(counts[name])})')
+    return 1 if growing else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
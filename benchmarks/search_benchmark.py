@@ -0,0 +1,95 @@
+"""Compare FTS5 product search against the old LIKE '%term%' scan.
+
+Seeds a throwaway SQLite database with a synthetic catalog and times both
+query shapes for a handful of type-ahead terms:
+    
+    python -m benchmarks.search_benchmark --products 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SYLLABLES = ['ba', 'ko', 'ri', 'ne', 'tu', 'sa', 'mi', 'lo', 'pe', 'da', 'gu', 'fe', 'zo', 'chi', 'ran']
+BRANDS = ['apple', 'banana', 'carrot', 'tomato', 'milk', 'cheese', 'chicken', 'salmon',
+          'bread', 'croissant', 'rice', 'pasta', 'juice', 'coffee', 'chips', 'cookie']
+
+def vocabulary(rng, size=3000):
+    words = set(BRANDS)
+    while len(words) < size:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+# Type-ahead prefixes, multi-word queries and a miss
+TERMS = ['app', 'croiss', 'banana rik', 'fresh salmon', 'nothingmatches']
+
+def seed(db, count):
+    from sqlalchemy import insert
+    from models.product import Product, Category
+    rng = random.Random(42)
+    words = vocabulary(rng)
+    db.session.add(Category(name='Benchmark'))
+    db.session.commit()
+    rows = []
+    for i in range(count):
+        name = ' '.join(rng.sample(words, 3)) + f' {i}'
+        rows.append({
+            'name': name, 'description': 'fresh ' + ' '.join(rng.sample(words, 6)),
+            'price': 1 + (i % 50), 'category_id': 1, 'stock_quantity': 10, 'is_active': True
+        })
+        if len(rows) == 5000:
+            db.session.execute(insert(Product), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(Product), rows)
+    db.session.commit()
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), max(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'search_bench.db')
+    from app import create_app
+    from models.database import db
+    from models.product import Product
+    from services.search import apply_search
+    
+    app = create_app()
+    with app.test_request_context():
+        started = time.perf_counter()
+        seed(db, args.products)
+        print(f'seeded {args.products} products in {time.perf_counter() - started:.1f}s '
+              f"(search backend: {app.extensions['product_search']})")
+        
+        print(f"{'term':<22}{'like p50':>10}{'like max':>10}{'fts p50':>10}{'fts max':>10}{'hits':>8}")
+        for term in TERMS:
+            base = Product.query.filter_by(is_active=True)
+            # Same shape as the listing endpoints: a COUNT plus the first page
+            def like():
+                query = base.filter(Product.name.contains(term))
+                return query.count(), query.order_by(Product.id).limit(20).all()
+            def fts():
+                query = apply_search(base, term)
+                return query.count(), query.limit(20).all()
+            like_p50, like_max = timed(like, args.repeat)
+            fts_p50, fts_max = timed(fts, args.repeat)
+            hits = fts()[0]
+            print(f'{term:<22}{like_p50:>8.2f}ms{like_max:>8.2f}ms{fts_p50:>8.2f}ms{fts_max:>8.2f}ms{hits:>8}')
+
+if __name__ == '__main__':
+    main()
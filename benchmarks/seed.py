@@ -0,0 +1,111 @@
+"""Synthetic store data for the benchmarks.
+
+:func:`seed_store` bulk-inserts a deterministic store into an empty database:
+user 1 is the admin ``admin``, users 2.. are customers ``customer2``,
+``customer3``, ... and every account has the password ``password``. Orders
+are spread round-robin over the customers, so order 1 belongs to user 2.
+Must be called inside an application context, or seed ``DATABASE_URL`` with:
+    
+    python -m benchmarks.seed --products 5000 --orders 20000
+"""
+import random
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from models.product import Product, Category
+from models.user import User
+from models.order import Order, OrderItem
+from services.sales_rollup import rebuild_sales_rollups
+
+PASSWORD = 'password'
+STATUSES = ['pending', 'processing', 'shipped', 'delivered', 'cancelled']
+WORDS = ['apple', 'banana', 'bread', 'cheese', 'coffee', 'milk', 'organic', 'rice', 'tomato', 'yogurt']
+
+CHUNK = 5000
+
+def _insert(db, model, rows):
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(insert(model), rows[start:start + CHUNK])
+
+def seed_store(db, users=100, categories=10, products=1000, orders=2000, items_per_order=3,
+               days=90, seed=0):
+    """Insert the store and return the row counts written."""
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    password_hash = generate_password_hash(PASSWORD)
+    
+    _insert(db, Category, [
+        {'name': f'Category {i}', 'description': f'Seeded category {i}', 'created_at': now}
+        for i in range(1, categories + 1)
+    ])
+    _insert(db, User, [
+        {'username': 'admin' if i == 1 else f'customer{i}', 'email': f'user{i}@example.com',
+         'password_hash': password_hash, 'first_name': 'Seed', 'last_name': f'User {i}',
+         'address': f'{i} Benchmark Street', 'is_admin': i == 1, 'created_at': now, 'updated_at': now}
+        for i in range(1, users + 1)
+    ])
+    
+    prices = {}
+    product_rows = []
+    for i in range(1, products + 1):
+        prices[i] = Decimal(rng.randint(50, 2000)) / 100
+        name = ' '.join(rng.sample(WORDS, 2))
+        product_rows.append({
+            'name': f'{name} {i}'.title(), 'description': f'Seeded {name} product',
+            'price': prices[i], 'category_id': 1 + i % categories,
+            'stock_quantity': rng.randint(0, 500), 'is_active': i % 20 != 0,
+            'created_at': now, 'updated_at': now
+        })
+    _insert(db, Product, product_rows)
+    
+    customers = max(users - 1, 1)
+    order_rows, item_rows = [], []
+    for order_id in range(1, orders + 1):
+        created_at = now - timedelta(seconds=rng.randint(0, days * 86400))
+        lines = rng.sample(range(1, products + 1), min(rng.randint(1, items_per_order * 2 - 1), products))
+        total = Decimal('0')
+        for product_id in lines:
+            quantity = rng.randint(1, 5)
+            total += prices[product_id] * quantity
+            item_rows.append({
+                'order_id': order_id, 'product_id': product_id,
+                'quantity': quantity, 'price': prices[product_id]
+            })
+        order_rows.append({
+            'user_id': 2 + (order_id - 1) % customers if users > 1 else 1,
+            'total_amount': total, 'status': rng.choice(STATUSES),
+            'shipping_address': 'Seeded address', 'created_at': created_at, 'updated_at': created_at
+        })
+    _insert(db, Order, order_rows)
+    _insert(db, OrderItem, item_rows)
+    db.session.commit()
+    rebuild_sales_rollups()
+    
+    return {
+        'users': users, 'categories': categories, 'products': products,
+        'orders': orders, 'order_items': len(item_rows)
+    }
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Seed the empty database in DATABASE_URL with a synthetic store')
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--categories', type=int, default=20)
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--orders', type=int, default=20000)
+    parser.add_argument('--items-per-order', type=int, default=3)
+    args = parser.parse_args()
+    
+    from app import create_app
+    from models.database import db
+    app = create_app()
+    with app.app_context():
+        if Product.query.first() is not None:
+            parser.error('the database already has products')
+        counts = seed_store(db, users=args.users, categories=args.categories, products=args.products,
+                            orders=args.orders, items_per_order=args.items_per_order)
+    print(', '.join(f'{count} {name}' for name, count in counts.items()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Cost of building and encoding large list responses.
+
+Seeds a store, then times the 1000-row admin product and order pages three
+ways: ORM objects through ``to_dict`` against the column-projected
+serializers, the stdlib encoder against orjson on the same payload, and the
+full endpoint through the test client with each JSON provider installed:
+    
+    python -m benchmarks.serialization_benchmark --rows 1000 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _time(function, repeat):
+    function()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000, help='rows per page')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'serialization_bench.db')
+    os.environ['CATALOG_CACHE_SIZE'] = '0'
+    os.environ['JOB_WORKERS'] = '0'
+    from flask.json.provider import DefaultJSONProvider
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from models.database import db
+    from models.product import Product
+    from models.order import Order
+    from services.json_provider import OrjsonProvider, orjson
+    from services.serializers import project_products, product_rows, project_orders, order_rows
+    from benchmarks.seed import seed_store
+    
+    if orjson is None:
+        parser.error('orjson is not installed')
+    
+    app = create_app()
+    with app.app_context():
+        seed_store(db, users=50, categories=20, products=args.rows, orders=args.rows, items_per_order=3, seed=0)
+        token = create_access_token(identity='1')
+    
+    pages = {
+        'products': (
+            lambda: [p.to_dict() for p in Product.query.order_by(Product.id).limit(args.rows)],
+            lambda: product_rows(project_products(Product.query).order_by(Product.id).limit(args.rows).all()),
+            f'/api/admin/products?per_page={args.rows}'
+        ),
+        'orders': (
+            lambda: [o.to_dict() for o in Order.with_items().order_by(Order.created_at.desc()).limit(args.rows)],
+            lambda: order_rows(project_orders(Order.query).order_by(Order.created_at.desc()).limit(args.rows).all()),
+            f'/api/admin/orders?per_page={args.rows}'
+        )
+    }
+    stdlib, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    
+    print(f"{'page':<10}{'orm ms':>9}{'projected':>11}{'json ms':>9}{'orjson':>9}"
+          f"{'endpoint':>10}{'+orjson':>9}{'bytes':>9}")
+    for name, (orm, projected, url) in pages.items():
+        with app.app_context():
+            assert orm() == projected()
+            orm_ms = _time(orm, args.repeat)
+            projected_ms = _time(projected, args.repeat)
+            payload = {name: projected()}
+            stdlib_ms = _time(lambda: stdlib.dumps(payload), args.repeat)
+            orjson_ms = _time(lambda: fast.dumps(payload), args.repeat)
+        endpoint = {}
+        for provider in (stdlib, fast):
+            app.json = provider
+            endpoint[provider] = _time(lambda: client.get(url, headers=headers), args.repeat)
+            size = len(client.get(url, headers=headers).data)
+        print(f'{name:<10}{orm_ms:>9.1f}{projected_ms:>11.1f}{stdlib_ms:>9.1f}{orjson_ms:>9.1f}'
+              f'{endpoint[stdlib]:>10.1f}{endpoint[fast]:>9.1f}{size:>9}')
+
+if __name__ == '__main__':
+    main()
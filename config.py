@@ -3,9 +3,86 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _flag(name, default):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes')
+
+def _engine_options(database_uri):
+    """Connection pool settings for SQLALCHEMY_ENGINE_OPTIONS."""
+    options = {
+        'pool_pre_ping': _flag('DB_POOL_PRE_PING', 'true'),
+        # Recycle before MySQL's wait_timeout closes idle connections
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    }
+    # In-memory SQLite uses a single-connection pool without size settings
+    if database_uri in ('sqlite://', 'sqlite:///:memory:'):
+        return options
+    options.update(
+        pool_size=int(os.environ.get('DB_POOL_SIZE', 10)),
+        max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    )
+    return options
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your-secret-key-change-this'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///grocery_store.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
+    # SQLite only: write-ahead logging and how long a writer waits for the lock
+    SQLITE_WAL = _flag('SQLITE_WAL', 'true')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-string'
     JWT_ACCESS_TOKEN_EXPIRES = False
+    # Response encoder: auto (orjson when installed), orjson or stdlib
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+    CATALOG_CACHE_SIZE = int(os.environ.get('CATALOG_CACHE_SIZE', 1024))
+    CATALOG_CACHE_TTL = int(os.environ.get('CATALOG_CACHE_TTL', 60))
+    # Seconds the admin dashboard payload is reused; 0 rebuilds it on every request
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 10))
+    # Rows written per transaction by the bulk product import
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+    IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 86400))
+    IDEMPOTENCY_CLAIM_TIMEOUT = int(os.environ.get('IDEMPOTENCY_CLAIM_TIMEOUT', 60))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 30))
+    # Apply pending migrations when the app starts; disable to run `flask db-upgrade` explicitly
+    AUTO_MIGRATE = _flag('AUTO_MIGRATE', 'true')
+    # Request instrumentation: slow statement log threshold, Server-Timing header (opt-in),
+    # /metrics and the bearer token it requires
+    SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
+    SERVER_TIMING = _flag('SERVER_TIMING', 'false')
+    METRICS_ENABLED = _flag('METRICS_ENABLED', 'true')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Background jobs: worker threads per process (0 = only `flask run-jobs`), retry backoff
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+    JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 300))
+    JOB_SWEEP_INTERVAL = float(os.environ.get('JOB_SWEEP_INTERVAL', 30))
+    JOB_BACKOFF_BASE = float(os.environ.get('JOB_BACKOFF_BASE', 2))
+    JOB_BACKOFF_MAX = float(os.environ.get('JOB_BACKOFF_MAX', 300))
+    # Carts: database (write-through) or memory (per-process store, written behind)
+    CART_STORE = os.environ.get('CART_STORE', 'database')
+    CART_STORE_SIZE = int(os.environ.get('CART_STORE_SIZE', 10000))
+    CART_STORE_TTL = int(os.environ.get('CART_STORE_TTL', 1800))
+    CART_FLUSH_INTERVAL = float(os.environ.get('CART_FLUSH_INTERVAL', 5))
+    ANONYMOUS_CART_TTL = int(os.environ.get('ANONYMOUS_CART_TTL', 2592000))
+    LOW_STOCK_THRESHOLD = int(os.environ.get('LOW_STOCK_THRESHOLD', 10))
+    # Password hashing (Werkzeug method string) and its bounded worker pool
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 1) // 2)))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 8))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 5))
+    # Failed logins allowed per client IP / username within the window (seconds)
+    LOGIN_THROTTLE = _flag('LOGIN_THROTTLE', 'true')
+    LOGIN_MAX_FAILURES_PER_IP = int(os.environ.get('LOGIN_MAX_FAILURES_PER_IP', 20))
+    LOGIN_MAX_FAILURES_PER_USER = int(os.environ.get('LOGIN_MAX_FAILURES_PER_USER', 5))
+    LOGIN_FAILURE_WINDOW = int(os.environ.get('LOGIN_FAILURE_WINDOW', 300))
+    LOGIN_THROTTLE_KEYS = int(os.environ.get('LOGIN_THROTTLE_KEYS', 100000))
+    # Days of sales behind the inventory report's velocity and days of cover
+    INVENTORY_VELOCITY_DAYS = int(os.environ.get('INVENTORY_VELOCITY_DAYS', 30))
+    # `flask serve` production server settings
+    SERVER_BIND = os.environ.get('SERVER_BIND', '0.0.0.0:5000')
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', (os.cpu_count() or 1) * 2 + 1))
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 4))
+    SERVER_TIMEOUT = int(os.environ.get('SERVER_TIMEOUT', 30))
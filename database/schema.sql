@@ -33,6 +33,7 @@ CREATE TABLE products (
     price DECIMAL(10, 2) NOT NULL,
     category_id INT,
     stock_quantity INT DEFAULT 0,
+    low_stock_threshold INT,
     image_url VARCHAR(500),
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -71,6 +72,24 @@ CREATE TABLE cart_items (
     quantity INT NOT NULL,
     session_id VARCHAR(255),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(id),
     FOREIGN KEY (product_id) REFERENCES products(id)
 );
+
+-- Indexes for the cart, order and catalog queries (migration 0002)
+CREATE INDEX ix_cart_items_user_product ON cart_items (user_id, product_id);
+CREATE INDEX ix_orders_user_created ON orders (user_id, created_at);
+CREATE INDEX ix_orders_status_created ON orders (status, created_at);
+CREATE INDEX ix_orders_created_at ON orders (created_at);
+CREATE INDEX ix_order_items_order_id ON order_items (order_id);
+CREATE INDEX ix_order_items_product_id ON order_items (product_id);
+CREATE INDEX ix_products_active_category ON products (is_active, category_id);
+CREATE INDEX ix_products_category_id ON products (category_id);
+
+-- Anonymous carts (migration 0004)
+CREATE INDEX ix_cart_items_session ON cart_items (session_id);
+
+-- Inventory report (migration 0005)
+CREATE INDEX ix_products_active_stock ON products (is_active, stock_quantity);
+CREATE INDEX ix_products_low_stock_threshold ON products (low_stock_threshold);
@@ -0,0 +1,81 @@
+"""Versioned schema migrations.
+
+Each module in ``migrations/versions`` is named ``NNNN_description.py`` and
+defines ``upgrade(connection)``. :func:`upgrade` applies every migration
+newer than the highest version recorded in ``schema_version``, each in its
+own transaction, and records it. Migrations must tolerate objects that an
+older ``db.create_all()`` or ``database/schema.sql`` already created, so an
+existing database is adopted rather than rebuilt.
+"""
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, Index, inspect, select, func, text
+
+_MODULE_NAME = re.compile(r'^(\d{4})_\w+$')
+
+_metadata = MetaData()
+schema_version = Table(
+    'schema_version', _metadata,
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('name', String(100), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+def available_migrations():
+    """``(version, module_name)`` pairs in version order."""
+    from migrations import versions
+    found = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        match = _MODULE_NAME.match(info.name)
+        if match:
+            found.append((int(match.group(1)), info.name))
+    return sorted(found)
+
+def current_version(connection):
+    if not inspect(connection).has_table('schema_version'):
+        return 0
+    return connection.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+def upgrade(engine, target=None, log=None):
+    """Apply pending migrations up to ``target`` (default: latest).
+    
+    Returns the list of module names applied.
+    """
+    with engine.begin() as connection:
+        _metadata.create_all(connection, checkfirst=True)
+        current = current_version(connection)
+    
+    applied = []
+    for version, name in available_migrations():
+        if version <= current or (target is not None and version > target):
+            continue
+        module = importlib.import_module(f'migrations.versions.{name}')
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(schema_version.insert().values(
+                version=version, name=name, applied_at=datetime.utcnow()
+            ))
+        applied.append(name)
+        if log:
+            log(f'Applied migration {name}')
+    return applied
+
+def add_column_if_missing(connection, table, column):
+    """Add a nullable ``column`` (an unattached Column) unless ``table`` already has it."""
+    existing = {col['name'] for col in inspect(connection).get_columns(table)}
+    if column.name in existing:
+        return False
+    column_type = column.type.compile(dialect=connection.dialect)
+    connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column.name} {column_type} NULL'))
+    return True
+
+def create_index_if_missing(connection, table, name, *columns, unique=False):
+    """Create an index unless one with that name already exists on ``table``."""
+    existing = {index['name'] for index in inspect(connection).get_indexes(table)}
+    if name in existing:
+        return False
+    table_ref = Table(table, MetaData(), autoload_with=connection)
+    Index(name, *(table_ref.c[column] for column in columns), unique=unique).create(connection)
+    return True
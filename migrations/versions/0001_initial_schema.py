@@ -0,0 +1,117 @@
+"""Baseline schema: the tables db.create_all() used to create.
+
+Table definitions are frozen here rather than read from the models, so later
+model changes are only ever applied by later migrations.
+"""
+from datetime import datetime
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, String, Text, Numeric, Boolean, DateTime, Date, Enum,
+    ForeignKey, UniqueConstraint
+)
+
+metadata = MetaData()
+
+Table(
+    'users', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String(50), unique=True, nullable=False),
+    Column('email', String(100), unique=True, nullable=False),
+    Column('password_hash', String(255), nullable=False),
+    Column('first_name', String(50), nullable=False),
+    Column('last_name', String(50), nullable=False),
+    Column('phone', String(20)),
+    Column('address', Text),
+    Column('is_admin', Boolean, default=False),
+    Column('created_at', DateTime, default=datetime.utcnow),
+    Column('updated_at', DateTime, default=datetime.utcnow)
+)
+
+Table(
+    'categories', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('description', Text),
+    Column('created_at', DateTime, default=datetime.utcnow)
+)
+
+Table(
+    'products', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('description', Text),
+    Column('price', Numeric(10, 2), nullable=False),
+    Column('category_id', Integer, ForeignKey('categories.id')),
+    Column('stock_quantity', Integer, default=0),
+    Column('image_url', String(500)),
+    Column('is_active', Boolean, default=True),
+    Column('created_at', DateTime, default=datetime.utcnow),
+    Column('updated_at', DateTime, default=datetime.utcnow)
+)
+
+Table(
+    'orders', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('total_amount', Numeric(10, 2), nullable=False),
+    Column('status', Enum('pending', 'processing', 'shipped', 'delivered', 'cancelled'), default='pending'),
+    Column('shipping_address', Text, nullable=False),
+    Column('created_at', DateTime, default=datetime.utcnow),
+    Column('updated_at', DateTime, default=datetime.utcnow)
+)
+
+Table(
+    'order_items', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('order_id', Integer, ForeignKey('orders.id'), nullable=False),
+    Column('product_id', Integer, ForeignKey('products.id'), nullable=False),
+    Column('quantity', Integer, nullable=False),
+    Column('price', Numeric(10, 2), nullable=False)
+)
+
+Table(
+    'cart_items', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id')),
+    Column('product_id', Integer, ForeignKey('products.id'), nullable=False),
+    Column('quantity', Integer, nullable=False),
+    Column('session_id', String(255)),
+    Column('created_at', DateTime, default=datetime.utcnow)
+)
+
+Table(
+    'daily_sales_summary', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('day', Date, nullable=False, index=True),
+    Column('status', String(20), nullable=False),
+    Column('order_count', Integer, nullable=False, default=0),
+    Column('revenue', Numeric(14, 2), nullable=False, default=0),
+    Column('updated_at', DateTime, default=datetime.utcnow),
+    UniqueConstraint('day', 'status', name='uq_daily_sales_summary_day_status')
+)
+
+Table(
+    'daily_product_sales', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('day', Date, nullable=False, index=True),
+    Column('product_id', Integer, ForeignKey('products.id'), nullable=False),
+    Column('quantity', Integer, nullable=False, default=0),
+    Column('revenue', Numeric(14, 2), nullable=False, default=0),
+    Column('updated_at', DateTime, default=datetime.utcnow),
+    UniqueConstraint('day', 'product_id', name='uq_daily_product_sales_day_product')
+)
+
+Table(
+    'idempotency_keys', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+    Column('key', String(255), nullable=False),
+    Column('request_hash', String(64), nullable=False),
+    Column('status_code', Integer),
+    Column('response_body', Text),
+    Column('created_at', DateTime, default=datetime.utcnow),
+    Column('expires_at', DateTime, nullable=False, index=True),
+    UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key')
+)
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
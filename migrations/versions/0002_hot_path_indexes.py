@@ -0,0 +1,23 @@
+"""Indexes for the predicates used by the cart, order and catalog endpoints."""
+from migrations import create_index_if_missing
+
+INDEXES = [
+    # get_cart / add_to_cart / checkout (user_id alone uses the leading column)
+    ('cart_items', 'ix_cart_items_user_product', ('user_id', 'product_id')),
+    # get_orders: WHERE user_id = ? ORDER BY created_at DESC
+    ('orders', 'ix_orders_user_created', ('user_id', 'created_at')),
+    # get_all_orders with and without a status filter
+    ('orders', 'ix_orders_status_created', ('status', 'created_at')),
+    ('orders', 'ix_orders_created_at', ('created_at',)),
+    # order serialization and per-product sales
+    ('order_items', 'ix_order_items_order_id', ('order_id',)),
+    ('order_items', 'ix_order_items_product_id', ('product_id',)),
+    # get_products: WHERE is_active = ? [AND category_id = ?]
+    ('products', 'ix_products_active_category', ('is_active', 'category_id')),
+    # get_all_products: WHERE category_id = ? (admins see inactive products too)
+    ('products', 'ix_products_category_id', ('category_id',)),
+]
+
+def upgrade(connection):
+    for table, name, columns in INDEXES:
+        create_index_if_missing(connection, table, name, *columns)
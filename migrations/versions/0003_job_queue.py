@@ -0,0 +1,23 @@
+"""Durable background job queue."""
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, Integer, String, Text, DateTime, Enum, Index
+
+metadata = MetaData()
+
+Table(
+    'jobs', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('payload', Text, nullable=False),
+    Column('status', Enum('queued', 'running', 'failed', name='job_status'), nullable=False, default='queued'),
+    Column('attempts', Integer, nullable=False, default=0),
+    Column('max_attempts', Integer, nullable=False, default=5),
+    Column('run_at', DateTime, nullable=False, default=datetime.utcnow),
+    Column('locked_at', DateTime),
+    Column('last_error', Text),
+    Column('created_at', DateTime, default=datetime.utcnow),
+    Index('ix_jobs_status_run_at', 'status', 'run_at')
+)
+
+def upgrade(connection):
+    metadata.create_all(connection, checkfirst=True)
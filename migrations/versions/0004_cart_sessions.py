@@ -0,0 +1,5 @@
+"""Index for anonymous carts, looked up and flushed by session id."""
+from migrations import create_index_if_missing
+
+def upgrade(connection):
+    create_index_if_missing(connection, 'cart_items', 'ix_cart_items_session', 'session_id')
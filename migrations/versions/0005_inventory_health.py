@@ -0,0 +1,17 @@
+"""Per-product low-stock thresholds and the indexes behind the inventory report."""
+from sqlalchemy import Column, Integer
+from migrations import add_column_if_missing, create_index_if_missing
+
+INDEXES = [
+    # inventory report: WHERE is_active = ? AND stock_quantity <= ?
+    ('products', 'ix_products_active_stock', ('is_active', 'stock_quantity')),
+    # MAX(low_stock_threshold) bounds that range scan
+    ('products', 'ix_products_low_stock_threshold', ('low_stock_threshold',)),
+    # sales velocity: per product, over the last N days
+    ('daily_product_sales', 'ix_daily_product_sales_product_day', ('product_id', 'day')),
+]
+
+def upgrade(connection):
+    add_column_if_missing(connection, 'products', Column('low_stock_threshold', Integer))
+    for table, name, columns in INDEXES:
+        create_index_if_missing(connection, table, name, *columns)
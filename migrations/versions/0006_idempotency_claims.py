@@ -0,0 +1,6 @@
+"""When an Idempotency-Key's in-progress claim was taken, so stale claims can expire."""
+from sqlalchemy import Column, DateTime
+from migrations import add_column_if_missing
+
+def upgrade(connection):
+    add_column_if_missing(connection, 'idempotency_keys', Column('claimed_at', DateTime))
@@ -0,0 +1,6 @@
+"""Last change of each cart line, so abandoned anonymous carts can be purged."""
+from sqlalchemy import Column, DateTime
+from migrations import add_column_if_missing
+
+def upgrade(connection):
+    add_column_if_missing(connection, 'cart_items', Column('updated_at', DateTime))
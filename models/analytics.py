@@ -0,0 +1,31 @@
+from .database import db
+from datetime import datetime
+
+class DailySalesSummary(db.Model):
+    """Per-day, per-status order counts and revenue, maintained incrementally."""
+    __tablename__ = 'daily_sales_summary'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'status', name='uq_daily_sales_summary_day_status'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class DailyProductSales(db.Model):
+    """Per-day, per-product quantity and revenue, maintained incrementally."""
+    __tablename__ = 'daily_product_sales'
+    __table_args__ = (
+        db.UniqueConstraint('day', 'product_id', name='uq_daily_product_sales_day_product'),
+        db.Index('ix_daily_product_sales_product_day', 'product_id', 'day'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
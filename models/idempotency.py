@@ -0,0 +1,21 @@
+from .database import db
+from datetime import datetime
+
+class IdempotencyKey(db.Model):
+    """Stored outcome of a request made with an Idempotency-Key header."""
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    # NULL until the original request finishes
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    # When the request now running with this key took it over
+    claimed_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
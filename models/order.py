@@ -1,8 +1,16 @@
 from .database import db
+from .product import Product
+from services.instrumentation import timed_serialization
+from sqlalchemy.orm import selectinload
 from datetime import datetime
 
 class Order(db.Model):
     __tablename__ = 'orders'
+    __table_args__ = (
+        db.Index('ix_orders_user_created', 'user_id', 'created_at'),
+        db.Index('ix_orders_status_created', 'status', 'created_at'),
+        db.Index('ix_orders_created_at', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -15,6 +23,14 @@ class Order(db.Model):
     # Relationships
     order_items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
     
+    @classmethod
+    def with_items(cls):
+        """Query that batch-loads order items and product names for to_dict()"""
+        return cls.query.options(
+            selectinload(cls.order_items).joinedload(OrderItem.product).load_only(Product.name)
+        )
+    
+    @timed_serialization
     def to_dict(self):
         return {
             'id': self.id,
@@ -29,6 +45,10 @@ class Order(db.Model):
 
 class OrderItem(db.Model):
     __tablename__ = 'order_items'
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),
+        db.Index('ix_order_items_product_id', 'product_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('orders.id'), nullable=False)
@@ -36,6 +56,7 @@ class OrderItem(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     price = db.Column(db.Numeric(10, 2), nullable=False)
     
+    @timed_serialization
     def to_dict(self):
         return {
             'id': self.id,
@@ -48,6 +69,10 @@ class OrderItem(db.Model):
 
 class CartItem(db.Model):
     __tablename__ = 'cart_items'
+    __table_args__ = (
+        db.Index('ix_cart_items_user_product', 'user_id', 'product_id'),
+        db.Index('ix_cart_items_session', 'session_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
@@ -55,7 +80,9 @@ class CartItem(db.Model):
     quantity = db.Column(db.Integer, nullable=False)
     session_id = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    @timed_serialization
     def to_dict(self):
         return {
             'id': self.id,
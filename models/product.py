@@ -1,4 +1,5 @@
 from .database import db
+from services.instrumentation import timed_serialization
 from datetime import datetime
 
 class Category(db.Model):
@@ -12,6 +13,7 @@ class Category(db.Model):
     # Relationships
     products = db.relationship('Product', backref='category', lazy=True)
     
+    @timed_serialization
     def to_dict(self):
         return {
             'id': self.id,
@@ -22,6 +24,12 @@ class Category(db.Model):
 
 class Product(db.Model):
     __tablename__ = 'products'
+    __table_args__ = (
+        db.Index('ix_products_active_category', 'is_active', 'category_id'),
+        db.Index('ix_products_category_id', 'category_id'),
+        db.Index('ix_products_active_stock', 'is_active', 'stock_quantity'),
+        db.Index('ix_products_low_stock_threshold', 'low_stock_threshold'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
@@ -29,6 +37,8 @@ class Product(db.Model):
     price = db.Column(db.Numeric(10, 2), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'))
     stock_quantity = db.Column(db.Integer, default=0)
+    # Overrides LOW_STOCK_THRESHOLD for this product when set
+    low_stock_threshold = db.Column(db.Integer)
     image_url = db.Column(db.String(500))
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -38,6 +48,7 @@ class Product(db.Model):
     order_items = db.relationship('OrderItem', backref='product', lazy=True)
     cart_items = db.relationship('CartItem', backref='product', lazy=True)
     
+    @timed_serialization
     def to_dict(self):
         return {
             'id': self.id,
@@ -1,5 +1,6 @@
 from .database import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from services.instrumentation import timed_serialization
+from services.passwords import password_hasher
 from datetime import datetime
 
 class User(db.Model):
@@ -22,11 +23,15 @@ class User(db.Model):
     cart_items = db.relationship('CartItem', backref='user', lazy=True)
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher().hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher().verify(self.password_hash, password)
     
+    def password_needs_rehash(self):
+        return password_hasher().needs_rehash(self.password_hash)
+    
+    @timed_serialization
     def to_dict(self):
         return {
             'id': self.id,
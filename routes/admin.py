@@ -1,10 +1,27 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
 from models.database import db
 from models.product import Product, Category
 from models.order import Order, OrderItem
 from models.user import User
+from services.sales_rollup import sales_summary
+from services.order_jobs import order_status_changed
+from services.jobs import job_queue
+from services.analytics import sales_overview, revenue_by_category, revenue_by_day
+from services.pagination import paginate_listing, InvalidCursor
+from services.identity import current_user_snapshot
+from services.idempotency import idempotent
+from services.inventory import adjust_products, InsufficientStock, UnknownProducts
+from services.inventory_report import inventory_report
+from services.dashboard import dashboard_summary, dashboard_cache
+from services.search import apply_search
+from services.serializers import project_products, product_rows, project_orders, order_rows
+from services.catalog_io import FORMATS, MIMETYPES, MAX_PRICE, upload_format, import_catalog, export_catalog
+from services.catalog_cache import (
+    catalog_cache, invalidate_products, invalidate_all_products, invalidate_categories
+)
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -14,10 +31,9 @@ def admin_required(f):
     
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user_snapshot()
         
-        if not user or not user.is_admin:
+        if not user or not user['is_admin']:
             return jsonify({'error': 'Admin access required'}), 403
         
         return f(*args, **kwargs)
@@ -30,8 +46,6 @@ def admin_required(f):
 @admin_required
 def get_all_products():
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
         category_id = request.args.get('category_id', type=int)
         search = request.args.get('search', '')
         
@@ -41,19 +55,17 @@ def get_all_products():
             query = query.filter_by(category_id=category_id)
         
         if search:
-            query = query.filter(Product.name.contains(search))
+            query = apply_search(query, search)
         
-        products = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        rows, meta = paginate_listing(project_products(query), (Product.id,))
         
         return jsonify({
-            'products': [product.to_dict() for product in products.items],
-            'total': products.total,
-            'pages': products.pages,
-            'current_page': page
+            'products': product_rows(rows),
+            **meta
         }), 200
         
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -80,12 +92,14 @@ def create_product():
             price=data['price'],
             category_id=data['category_id'],
             stock_quantity=data.get('stock_quantity', 0),
+            low_stock_threshold=data.get('low_stock_threshold'),
             image_url=data.get('image_url'),
             is_active=data.get('is_active', True)
         )
         
         db.session.add(product)
         db.session.commit()
+        invalidate_products(product.id)
         
         return jsonify({
             'message': 'Product created successfully',
@@ -121,12 +135,16 @@ def update_product(product_id):
             product.category_id = data['category_id']
         if 'stock_quantity' in data:
             product.stock_quantity = data['stock_quantity']
+        if 'low_stock_threshold' in data:
+            # null falls back to LOW_STOCK_THRESHOLD
+            product.low_stock_threshold = data['low_stock_threshold']
         if 'image_url' in data:
             product.image_url = data['image_url']
         if 'is_active' in data:
             product.is_active = data['is_active']
         
         db.session.commit()
+        invalidate_products(product_id)
         
         return jsonify({
             'message': 'Product updated successfully',
@@ -149,6 +167,7 @@ def delete_product(product_id):
         # Soft delete by setting is_active to False
         product.is_active = False
         db.session.commit()
+        invalidate_products(product_id)
         
         return jsonify({'message': 'Product deleted successfully'}), 200
         
@@ -156,6 +175,126 @@ def delete_product(product_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Bulk Catalog Import/Export
+@admin_bp.route('/products/import', methods=['POST'])
+@jwt_required()
+@admin_required
+def import_products():
+    """Upsert products from a CSV or JSONL upload (multipart ``file`` or raw body)"""
+    try:
+        upload = request.files.get('file')
+        if upload is not None:
+            stream, fmt = upload.stream, upload_format(upload.filename, upload.mimetype)
+        else:
+            stream, fmt = request.stream, upload_format(None, request.mimetype)
+        fmt = request.args.get('format', fmt)
+        
+        if fmt not in FORMATS:
+            return jsonify({'error': 'format must be csv or jsonl'}), 400
+        
+        result = import_catalog(stream, fmt)
+        if result.created or result.updated:
+            invalidate_all_products()
+        
+        return jsonify(result.summary()), 400 if result.stream_error else 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/products/export', methods=['GET'])
+@jwt_required()
+@admin_required
+def export_products():
+    """Stream the catalog as CSV or JSONL"""
+    fmt = request.args.get('format', 'csv')
+    category_id = request.args.get('category_id', type=int)
+    
+    if fmt not in FORMATS:
+        return jsonify({'error': 'format must be csv or jsonl'}), 400
+    
+    query = Product.query
+    
+    if category_id:
+        query = query.filter_by(category_id=category_id)
+    
+    return Response(
+        stream_with_context(export_catalog(query, fmt)),
+        mimetype=MIMETYPES[fmt],
+        headers={'Content-Disposition': f'attachment; filename=products.{fmt}'}
+    )
+
+def _parse_adjustments(adjustments):
+    """Sum stock deltas and collect prices per product; raises ValueError"""
+    if not isinstance(adjustments, list) or not adjustments:
+        raise ValueError('adjustments must be a non-empty list')
+    
+    stock_deltas, prices = {}, {}
+    for index, entry in enumerate(adjustments):
+        if not isinstance(entry, dict):
+            raise ValueError(f'adjustments[{index}] must be an object')
+        
+        product_id = entry.get('product_id')
+        if not isinstance(product_id, int) or isinstance(product_id, bool):
+            raise ValueError(f'adjustments[{index}]: product_id must be an integer')
+        if 'stock_delta' not in entry and 'price' not in entry:
+            raise ValueError(f'adjustments[{index}]: stock_delta or price is required')
+        
+        if 'stock_delta' in entry:
+            delta = entry['stock_delta']
+            if not isinstance(delta, int) or isinstance(delta, bool):
+                raise ValueError(f'adjustments[{index}]: stock_delta must be an integer')
+            stock_deltas[product_id] = stock_deltas.get(product_id, 0) + delta
+        if 'price' in entry:
+            try:
+                price = Decimal(str(entry['price'])).quantize(Decimal('0.01'))
+                valid = 0 < price <= MAX_PRICE
+            except InvalidOperation:
+                valid = False
+            if not valid or isinstance(entry['price'], bool):
+                raise ValueError(f'adjustments[{index}]: price must be between 0.01 and {MAX_PRICE}')
+            prices[product_id] = price
+    
+    return stock_deltas, prices
+
+@admin_bp.route('/products/adjustments', methods=['POST'])
+@jwt_required()
+@admin_required
+@idempotent
+def adjust_products_batch():
+    """Apply many stock deltas and price changes in one transaction"""
+    try:
+        data = request.get_json()
+        
+        try:
+            stock_deltas, prices = _parse_adjustments(data.get('adjustments'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        try:
+            adjust_products(stock_deltas, prices)
+        except UnknownProducts as e:
+            db.session.rollback()
+            return jsonify({'error': 'Products not found', 'product_ids': e.product_ids}), 404
+        except InsufficientStock as e:
+            db.session.rollback()
+            return jsonify({'error': str(e), 'product_id': e.product_id}), 400
+        
+        db.session.commit()
+        product_ids = set(stock_deltas) | set(prices)
+        invalidate_products(*product_ids)
+        
+        return jsonify({
+            'message': 'Products adjusted successfully',
+            'products': len(product_ids),
+            'stock_adjusted': len(stock_deltas),
+            'prices_changed': len(prices)
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 # Category Management
 @admin_bp.route('/categories', methods=['GET'])
 @jwt_required()
@@ -187,6 +326,7 @@ def create_category():
         
         db.session.add(category)
         db.session.commit()
+        invalidate_categories()
         
         return jsonify({
             'message': 'Category created successfully',
@@ -214,6 +354,7 @@ def update_category(category_id):
             category.description = data['description']
         
         db.session.commit()
+        invalidate_categories()
         
         return jsonify({
             'message': 'Category updated successfully',
@@ -230,8 +371,6 @@ def update_category(category_id):
 @admin_required
 def get_all_orders():
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
         status = request.args.get('status')
         
         query = Order.query
@@ -239,17 +378,16 @@ def get_all_orders():
         if status:
             query = query.filter_by(status=status)
         
-        orders = query.order_by(Order.created_at.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        # Newest first; the id tie-breaker keeps cursor pages stable
+        rows, meta = paginate_listing(project_orders(query), (Order.created_at, Order.id), descending=True)
         
         return jsonify({
-            'orders': [order.to_dict() for order in orders.items],
-            'total': orders.total,
-            'pages': orders.pages,
-            'current_page': page
+            'orders': order_rows(rows),
+            **meta
         }), 200
         
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -258,7 +396,7 @@ def get_all_orders():
 @admin_required
 def get_order_details(order_id):
     try:
-        order = Order.query.get(order_id)
+        order = Order.with_items().filter_by(id=order_id).first()
         if not order:
             return jsonify({'error': 'Order not found'}), 404
         
@@ -272,7 +410,7 @@ def get_order_details(order_id):
 @admin_required
 def update_order_status(order_id):
     try:
-        order = Order.query.get(order_id)
+        order = Order.with_items().filter_by(id=order_id).first()
         if not order:
             return jsonify({'error': 'Order not found'}), 404
         
@@ -286,6 +424,7 @@ def update_order_status(order_id):
         if new_status not in valid_statuses:
             return jsonify({'error': 'Invalid status'}), 400
         
+        order_status_changed(order.id, order.status, new_status)
         order.status = new_status
         db.session.commit()
         
@@ -299,58 +438,104 @@ def update_order_status(order_id):
         return jsonify({'error': str(e)}), 500
 
 # Analytics
+def _date_range_args():
+    """Parse the optional start_date/end_date query parameters"""
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    return (
+        datetime.fromisoformat(start_date) if start_date else None,
+        datetime.fromisoformat(end_date) if end_date else None
+    )
+
 @admin_bp.route('/analytics/sales', methods=['GET'])
 @jwt_required()
 @admin_required
 def get_sales_analytics():
     try:
-        # Get date range from query parameters
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
+        start, end = _date_range_args()
         
-        query = Order.query
+        # source=orders aggregates the raw order tables instead of the rollups
+        if request.args.get('source') == 'orders':
+            return jsonify(sales_overview(start, end)), 200
         
-        if start_date:
-            query = query.filter(Order.created_at >= datetime.fromisoformat(start_date))
-        if end_date:
-            query = query.filter(Order.created_at <= datetime.fromisoformat(end_date))
-        
-        orders = query.all()
-        
-        # Calculate analytics
-        total_orders = len(orders)
-        total_revenue = sum(float(order.total_amount) for order in orders)
-        avg_order_value = total_revenue / total_orders if total_orders > 0 else 0
-        
-        # Orders by status
-        status_counts = {}
-        for order in orders:
-            status_counts[order.status] = status_counts.get(order.status, 0) + 1
-        
-        # Top selling products
-        product_sales = {}
-        for order in orders:
-            for item in order.order_items:
-                product_name = item.product.name if item.product else f"Product {item.product_id}"
-                if product_name not in product_sales:
-                    product_sales[product_name] = {'quantity': 0, 'revenue': 0}
-                product_sales[product_name]['quantity'] += item.quantity
-                product_sales[product_name]['revenue'] += float(item.price * item.quantity)
-        
-        # Sort by revenue
-        top_products = sorted(
-            product_sales.items(),
-            key=lambda x: x[1]['revenue'],
-            reverse=True
-        )[:10]
+        # Whole days come from the rollup tables, partial days from raw orders
+        return jsonify(sales_summary(start=start, end=end)), 200
         
-        return jsonify({
-            'total_orders': total_orders,
-            'total_revenue': total_revenue,
-            'average_order_value': avg_order_value,
-            'orders_by_status': status_counts,
-            'top_products': [{'name': name, **data} for name, data in top_products]
-        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/analytics/sales/categories', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_category_sales():
+    try:
+        start, end = _date_range_args()
+        return jsonify({'categories': revenue_by_category(start, end)}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/analytics/sales/daily', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_daily_sales():
+    try:
+        start, end = _date_range_args()
+        return jsonify({'days': revenue_by_day(start, end)}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Dashboard
+@admin_bp.route('/dashboard', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_dashboard():
+    """Every headline number of the admin dashboard in one response"""
+    try:
+        return jsonify(dashboard_summary()), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Inventory
+@admin_bp.route('/inventory', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_inventory_health():
+    """Low and out-of-stock products with sales velocity and days of cover"""
+    try:
+        days = request.args.get('days', current_app.config.get('INVENTORY_VELOCITY_DAYS', 30), type=int)
+        limit = request.args.get('limit', 50, type=int)
+        if not 1 <= days <= 365:
+            return jsonify({'error': 'days must be between 1 and 365'}), 400
+        if not 1 <= limit <= 500:
+            return jsonify({'error': 'limit must be between 1 and 500'}), 400
+        
+        threshold = current_app.config.get('LOW_STOCK_THRESHOLD', 10)
+        return jsonify(inventory_report(threshold, days=days, limit=limit)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Cache
+@admin_bp.route('/cache/stats', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_cache_stats():
+    try:
+        return jsonify({'catalog': catalog_cache().stats(), 'dashboard': dashboard_cache().stats()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Background jobs
+@admin_bp.route('/jobs/stats', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_job_stats():
+    try:
+        return jsonify(job_queue().stats()), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -361,19 +546,14 @@ def get_sales_analytics():
 @admin_required
 def get_all_users():
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        
-        users = User.query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        users, meta = paginate_listing(User.query, (User.id,))
         
         return jsonify({
-            'users': [user.to_dict() for user in users.items],
-            'total': users.total,
-            'pages': users.pages,
-            'current_page': page
+            'users': [user.to_dict() for user in users],
+            **meta
         }), 200
         
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,10 +1,20 @@
+import math
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from models.database import db
 from models.user import User
+from services.identity import current_user_snapshot, invalidate_user
+from services.cart import merge_session_cart
+from services.passwords import PasswordHasherBusy
+from services.rate_limit import login_throttle
 
 auth_bp = Blueprint('auth', __name__)
 
+def _retry_later(message, seconds, status):
+    response = jsonify({'error': message, 'retry_after': seconds})
+    response.headers['Retry-After'] = str(seconds)
+    return response, status
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     try:
@@ -37,6 +47,10 @@ def register():
         db.session.add(user)
         db.session.commit()
         
+        # Keep what the visitor put in their cart before registering
+        if merge_session_cart(user.id):
+            db.session.commit()
+        
         # Create access token
         access_token = create_access_token(identity=str(user.id))
         
@@ -46,6 +60,9 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return _retry_later('Server busy, please retry', 1, 503)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -58,13 +75,30 @@ def login():
         if not data.get('username') or not data.get('password'):
             return jsonify({'error': 'Username and password are required'}), 400
         
+        # Refuse clients with too many recent failures before any hash work
+        throttle = login_throttle()
+        wait = throttle.retry_after(request.remote_addr, data['username'])
+        if wait:
+            return _retry_later('Too many failed login attempts', math.ceil(wait), 429)
+        
         # Find user by username or email
         user = User.query.filter(
             (User.username == data['username']) | (User.email == data['username'])
         ).first()
         
         if not user or not user.check_password(data['password']):
+            throttle.failed(request.remote_addr, data['username'])
             return jsonify({'error': 'Invalid credentials'}), 401
+        throttle.succeeded(data['username'])
+        
+        # Upgrade hashes made with older PASSWORD_HASH_* settings
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+        
+        # Fold the anonymous cart from X-Cart-Session into the customer's cart
+        if merge_session_cart(user.id):
+            db.session.commit()
         
         # Create access token
         access_token = create_access_token(identity=str(user.id))
@@ -75,20 +109,23 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except PasswordHasherBusy:
+        db.session.rollback()
+        return _retry_later('Server busy, please retry', 1, 503)
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/profile', methods=['GET'])
 @jwt_required()
 def get_profile():
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_user_snapshot()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify({'user': user.to_dict()}), 200
+        return jsonify({'user': user}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -122,6 +159,7 @@ def update_profile():
             user.email = data['email']
         
         db.session.commit()
+        invalidate_user(user.id)
         
         return jsonify({
             'message': 'Profile updated successfully',
@@ -4,6 +4,22 @@ from models.database import db
 from models.product import Product, Category
 from models.order import Order, OrderItem, CartItem
 from models.user import User
+from services.order_jobs import order_placed
+from services.inventory import reserve_stock, InsufficientStock, UnknownProducts
+from services.idempotency import idempotent
+from services.cart import (
+    SESSION_HEADER, InvalidCartSession, OPERATIONS, MAX_OPERATIONS, request_cart, user_cart,
+    session_id_of, load_cart, save_cart, cart_products, cart_product_rows, apply_operations,
+    cart_view, cart_payload, discard_cart
+)
+from services.pagination import paginate_listing, InvalidCursor
+from services.search import apply_search
+from services.serializers import project_products, product_rows, project_orders, order_rows
+from services.catalog_cache import (
+    catalog_cache, product_list_key, product_key, categories_key, invalidate_product_details
+)
+from services.http_cache import Validated, make_etag, payload_etag, respond, validated_response
+from sqlalchemy import func, insert
 from datetime import datetime
 
 customer_bp = Blueprint('customer', __name__)
@@ -11,93 +27,106 @@ customer_bp = Blueprint('customer', __name__)
 @customer_bp.route('/products', methods=['GET'])
 def get_products():
     try:
-        # Get query parameters
-        category_id = request.args.get('category_id', type=int)
-        search = request.args.get('search', '')
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 20, type=int)
-        
-        # Build query
-        query = Product.query.filter_by(is_active=True)
-        
-        if category_id:
-            query = query.filter_by(category_id=category_id)
-        
-        if search:
-            query = query.filter(Product.name.contains(search))
-        
-        # Paginate results
-        products = query.paginate(
-            page=page, per_page=per_page, error_out=False
-        )
-        
-        return jsonify({
-            'products': [product.to_dict() for product in products.items],
-            'total': products.total,
-            'pages': products.pages,
-            'current_page': page
-        }), 200
+        return respond(catalog_cache().get_or_set(product_list_key(), _product_listing))
         
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _product_listing():
+    # Get query parameters
+    category_id = request.args.get('category_id', type=int)
+    search = request.args.get('search', '')
+    
+    # Build query
+    query = Product.query.filter_by(is_active=True)
+    
+    if category_id:
+        query = query.filter_by(category_id=category_id)
+    
+    if search:
+        query = apply_search(query, search)
+    
+    # Paginate results (page/per_page, or keyset paging with cursor)
+    rows, meta = paginate_listing(project_products(query), (Product.id,))
+    
+    payload = {
+        'products': product_rows(rows),
+        **meta
+    }
+    # No Last-Modified: deactivations and deletes shift rows between pages
+    # without touching any timestamp on the page, so only the ETag is safe
+    return Validated(payload, payload_etag(payload), None)
+
 @customer_bp.route('/products/<int:product_id>', methods=['GET'])
 def get_product(product_id):
     try:
-        product = Product.query.get(product_id)
+        validated = catalog_cache().get_or_set(product_key(product_id), lambda: _product_detail(product_id))
         
-        if not product or not product.is_active:
+        if validated is None:
             return jsonify({'error': 'Product not found'}), 404
         
-        return jsonify({'product': product.to_dict()}), 200
+        return respond(validated)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _product_detail(product_id):
+    product = Product.query.get(product_id)
+    
+    if not product or not product.is_active:
+        return None
+    
+    payload = {'product': product.to_dict()}
+    # The payload embeds the category name, which changes without updated_at
+    return Validated(payload, payload_etag(payload), None)
+
 @customer_bp.route('/categories', methods=['GET'])
 def get_categories():
     try:
-        categories = Category.query.all()
-        return jsonify({
-            'categories': [category.to_dict() for category in categories]
-        }), 200
+        return respond(catalog_cache().get_or_set(categories_key(), _category_listing))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _category_listing():
+    categories = Category.query.all()
+    payload = {'categories': [category.to_dict() for category in categories]}
+    # Categories have no updated_at, so a rename can only show in the ETag
+    return Validated(payload, payload_etag(payload), None)
+
+def _cart_response(payload, key, status=200):
+    """JSON response that tells an anonymous client which cart session it is using"""
+    session_id = session_id_of(key)
+    if session_id is None:
+        return jsonify(payload), status
+    response = jsonify({**payload, 'cart_session': session_id})
+    response.headers[SESSION_HEADER] = session_id
+    return response, status
+
 @customer_bp.route('/cart', methods=['GET'])
-@jwt_required()
+@jwt_required(optional=True)
 def get_cart():
     try:
-        user_id = get_jwt_identity()
-        print(f"[DEBUG] Getting cart for user_id: {user_id} (type: {type(user_id)})")
-        # Convert string ID to int for database query
-        user_id = int(user_id) if isinstance(user_id, str) else user_id
-        print(f"[DEBUG] Converted user_id: {user_id}")
-        
-        cart_items = CartItem.query.filter_by(user_id=user_id).all()
-        print(f"[DEBUG] Found {len(cart_items)} cart items")
+        key = request_cart()
+        if key is None:
+            return jsonify({'error': f'Login or an {SESSION_HEADER} header is required'}), 401
         
-        total_amount = sum(item.product.price * item.quantity for item in cart_items if item.product)
-        
-        return jsonify({
-            'cart_items': [item.to_dict() for item in cart_items],
-            'total_amount': float(total_amount)
-        }), 200
+        return _cart_response(cart_view(key), key)
         
+    except InvalidCartSession as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        import traceback
-        print(f"[ERROR] Cart loading error: {str(e)}")
-        print(f"[ERROR] Traceback: {traceback.format_exc()}")
         return jsonify({'error': str(e)}), 500
 
 @customer_bp.route('/cart', methods=['POST'])
-@jwt_required()
+@jwt_required(optional=True)
+@idempotent
 def add_to_cart():
     try:
-        user_id = get_jwt_identity()
-        # Convert string ID to int for database query
-        user_id = int(user_id) if isinstance(user_id, str) else user_id
+        # Anonymous visitors get a new cart session on their first add
+        key = request_cart(create=True)
         data = request.get_json()
         
         product_id = data.get('product_id')
@@ -105,96 +134,160 @@ def add_to_cart():
         
         if not product_id:
             return jsonify({'error': 'Product ID is required'}), 400
+        if not isinstance(quantity, int) or quantity < 1:
+            return jsonify({'error': 'Quantity must be a positive integer'}), 400
         
         # Check if product exists and is active
         product = Product.query.get(product_id)
         if not product or not product.is_active:
             return jsonify({'error': 'Product not found'}), 404
         
-        # Check stock availability
-        if product.stock_quantity < quantity:
+        # Check stock availability, including what the cart already holds
+        lines = load_cart(key)
+        updated = {**lines, product.id: lines.get(product.id, 0) + quantity}
+        if updated[product.id] > product.stock_quantity:
             return jsonify({'error': 'Insufficient stock'}), 400
         
-        # Check if item already exists in cart
-        existing_item = CartItem.query.filter_by(
-            user_id=user_id, product_id=product_id
-        ).first()
-        
-        if existing_item:
-            existing_item.quantity += quantity
-            if existing_item.quantity > product.stock_quantity:
-                return jsonify({'error': 'Insufficient stock'}), 400
-        else:
-            cart_item = CartItem(
-                user_id=user_id,
-                product_id=product_id,
-                quantity=quantity
-            )
-            db.session.add(cart_item)
-        
+        save_cart(key, lines, updated)
         db.session.commit()
         
-        return jsonify({'message': 'Item added to cart successfully'}), 200
+        return _cart_response({'message': 'Item added to cart successfully'}, key)
         
+    except InvalidCartSession as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @customer_bp.route('/cart/<int:item_id>', methods=['PUT'])
-@jwt_required()
+@jwt_required(optional=True)
 def update_cart_item(item_id):
+    """Set the quantity of a cart line; ``item_id`` is the line's product id"""
     try:
-        user_id = get_jwt_identity()
-        # Convert string ID to int for database query
-        user_id = int(user_id) if isinstance(user_id, str) else user_id
+        key = request_cart()
+        if key is None:
+            return jsonify({'error': f'Login or an {SESSION_HEADER} header is required'}), 401
         data = request.get_json()
         
         quantity = data.get('quantity')
         if quantity is None:
             return jsonify({'error': 'Quantity is required'}), 400
         
-        cart_item = CartItem.query.filter_by(id=item_id, user_id=user_id).first()
-        if not cart_item:
+        lines = load_cart(key)
+        if item_id not in lines:
             return jsonify({'error': 'Cart item not found'}), 404
         
+        updated = dict(lines)
         if quantity <= 0:
-            db.session.delete(cart_item)
+            del updated[item_id]
         else:
-            if cart_item.product.stock_quantity < quantity:
+            product = Product.query.get(item_id)
+            if not product or product.stock_quantity < quantity:
                 return jsonify({'error': 'Insufficient stock'}), 400
-            cart_item.quantity = quantity
+            updated[item_id] = quantity
         
+        save_cart(key, lines, updated)
         db.session.commit()
         
-        return jsonify({'message': 'Cart item updated successfully'}), 200
+        return _cart_response({'message': 'Cart item updated successfully'}, key)
         
+    except InvalidCartSession as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @customer_bp.route('/cart/<int:item_id>', methods=['DELETE'])
-@jwt_required()
+@jwt_required(optional=True)
 def remove_from_cart(item_id):
+    """Remove a cart line; ``item_id`` is the line's product id"""
     try:
-        user_id = get_jwt_identity()
-        # Convert string ID to int for database query
-        user_id = int(user_id) if isinstance(user_id, str) else user_id
-        cart_item = CartItem.query.filter_by(id=item_id, user_id=user_id).first()
+        key = request_cart()
+        if key is None:
+            return jsonify({'error': f'Login or an {SESSION_HEADER} header is required'}), 401
         
-        if not cart_item:
+        lines = load_cart(key)
+        if item_id not in lines:
             return jsonify({'error': 'Cart item not found'}), 404
         
-        db.session.delete(cart_item)
+        save_cart(key, lines, {product_id: quantity for product_id, quantity in lines.items() if product_id != item_id})
+        db.session.commit()
+        
+        return _cart_response({'message': 'Item removed from cart successfully'}, key)
+        
+    except InvalidCartSession as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def _parse_cart_operations(operations):
+    """Validate a batch into ``[(op, product_id, quantity)]``; raises ValueError"""
+    if not isinstance(operations, list) or not operations:
+        raise ValueError('operations must be a non-empty list')
+    if len(operations) > MAX_OPERATIONS:
+        raise ValueError(f'At most {MAX_OPERATIONS} operations are allowed per request')
+    
+    parsed = []
+    for index, entry in enumerate(operations):
+        if not isinstance(entry, dict):
+            raise ValueError(f'operations[{index}] must be an object')
+        
+        op = entry.get('op')
+        if op not in OPERATIONS:
+            raise ValueError(f"operations[{index}]: op must be one of {', '.join(OPERATIONS)}")
+        product_id = entry.get('product_id')
+        if not isinstance(product_id, int) or isinstance(product_id, bool):
+            raise ValueError(f'operations[{index}]: product_id must be an integer')
+        
+        quantity = entry.get('quantity', 1 if op == 'add' else None)
+        if op != 'remove':
+            minimum = 1 if op == 'add' else 0
+            if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < minimum:
+                raise ValueError(f'operations[{index}]: quantity must be an integer of at least {minimum}')
+        parsed.append((op, product_id, quantity))
+    
+    return parsed
+
+@customer_bp.route('/cart/batch', methods=['POST'])
+@jwt_required(optional=True)
+@idempotent
+def batch_cart():
+    """Apply many add/set/remove operations in one transaction and return the cart"""
+    try:
+        # Like a single add, a batch starts an anonymous cart session when needed
+        key = request_cart(create=True)
+        data = request.get_json()
+        
+        try:
+            operations = _parse_cart_operations(data.get('operations'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # One query covers the products named by the batch and those already in the cart
+        lines = load_cart(key)
+        products = cart_product_rows(set(lines) | {product_id for _, product_id, _ in operations})
+        try:
+            updated = apply_operations(lines, operations, products)
+        except UnknownProducts as e:
+            return jsonify({'error': 'Products not found', 'product_ids': e.product_ids}), 404
+        except InsufficientStock as e:
+            return jsonify({'error': str(e), 'product_id': e.product_id}), 400
+        
+        save_cart(key, lines, updated)
         db.session.commit()
         
-        return jsonify({'message': 'Item removed from cart successfully'}), 200
+        return _cart_response(cart_payload(key, updated, products), key)
         
+    except InvalidCartSession as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @customer_bp.route('/checkout', methods=['POST'])
 @jwt_required()
+@idempotent
 def checkout():
     try:
         user_id = get_jwt_identity()
@@ -206,21 +299,27 @@ def checkout():
         if not shipping_address:
             return jsonify({'error': 'Shipping address is required'}), 400
         
-        # Get cart items
-        cart_items = CartItem.query.filter_by(user_id=user_id).all()
-        if not cart_items:
+        # Get cart lines with their products in one query
+        key = user_cart(user_id)
+        lines, products = cart_products(key)
+        if not lines:
             return jsonify({'error': 'Cart is empty'}), 400
         
-        # Calculate total and validate stock
+        # Calculate total and validate products
         total_amount = 0
-        for item in cart_items:
-            if not item.product or not item.product.is_active:
-                return jsonify({'error': f'Product {item.product_id} is no longer available'}), 400
-            
-            if item.product.stock_quantity < item.quantity:
-                return jsonify({'error': f'Insufficient stock for {item.product.name}'}), 400
+        for product_id, quantity in lines.items():
+            product = products.get(product_id)
+            if product is None or not product.is_active:
+                return jsonify({'error': f'Product {product_id} is no longer available'}), 400
             
-            total_amount += float(item.product.price * item.quantity)
+            total_amount += float(product.price * quantity)
+        
+        # Take the stock in one conditional batch so parallel checkouts can't oversell
+        try:
+            reserve_stock(lines)
+        except InsufficientStock as e:
+            db.session.rollback()
+            return jsonify({'error': f'Insufficient stock for {products[e.product_id].name}'}), 400
         
         # Create order
         order = Order(
@@ -231,23 +330,26 @@ def checkout():
         db.session.add(order)
         db.session.flush()  # Get order ID
         
-        # Create order items and update stock
-        for item in cart_items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                price=item.product.price
-            )
-            db.session.add(order_item)
-            
-            # Update stock
-            item.product.stock_quantity -= item.quantity
+        # Create all order items with a single bulk insert
+        db.session.execute(insert(OrderItem), [
+            {'order_id': order.id, 'product_id': product_id, 'quantity': quantity, 'price': products[product_id].price}
+            for product_id, quantity in lines.items()
+        ])
+        
+        # Rollups and stock alerts run in the background, queued with the order
+        order_placed(order.id, lines)
         
         # Clear cart
         CartItem.query.filter_by(user_id=user_id).delete()
         
+        order_id = order.id
         db.session.commit()
+        discard_cart(key)
+        
+        # Stock changed; cached listings catch up when their TTL lapses
+        invalidate_product_details(*lines)
+        
+        order = Order.with_items().filter_by(id=order_id).one()
         
         return jsonify({
             'message': 'Order placed successfully',
@@ -265,11 +367,19 @@ def get_orders():
         user_id = get_jwt_identity()
         # Convert string ID to int for database query
         user_id = int(user_id) if isinstance(user_id, str) else user_id
-        orders = Order.query.filter_by(user_id=user_id).order_by(Order.created_at.desc()).all()
-        
-        return jsonify({
-            'orders': [order.to_dict() for order in orders]
-        }), 200
+        # Validate against one aggregate row before loading any orders
+        count, last_modified, last_id = db.session.query(
+            func.count(Order.id), func.max(Order.updated_at), func.max(Order.id)
+        ).filter(Order.user_id == user_id).one()
+        
+        def build():
+            rows = project_orders(Order.query.filter_by(user_id=user_id)).order_by(Order.created_at.desc()).all()
+            return {'orders': order_rows(rows)}
+        
+        return validated_response(
+            make_etag('orders', user_id, count, last_modified, last_id), last_modified, build,
+            cache_control='private, no-cache'
+        )
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -281,7 +391,7 @@ def get_order(order_id):
         user_id = get_jwt_identity()
         # Convert string ID to int for database query
         user_id = int(user_id) if isinstance(user_id, str) else user_id
-        order = Order.query.filter_by(id=order_id, user_id=user_id).first()
+        order = Order.with_items().filter_by(id=order_id, user_id=user_id).first()
         
         if not order:
             return jsonify({'error': 'Order not found'}), 404
@@ -0,0 +1,114 @@
+"""SQL-side aggregation queries over orders, order items and products.
+
+Each helper pushes the GROUP BY / SUM / ORDER BY work into the database and
+iterates the aggregate rows only, so memory stays flat no matter how many
+orders fall inside the window.
+"""
+from datetime import date
+from sqlalchemy import func
+from models.database import db
+from models.order import Order, OrderItem
+from models.product import Product, Category
+
+def _window(query, start=None, end=None, end_inclusive=True):
+    """Restrict ``query`` to orders created in the given window."""
+    if start is not None:
+        query = query.filter(Order.created_at >= start)
+    if end is not None:
+        query = query.filter(Order.created_at <= end if end_inclusive else Order.created_at < end)
+    return query
+
+def _line_revenue():
+    return func.sum(OrderItem.price * OrderItem.quantity)
+
+def status_breakdown(start=None, end=None, end_inclusive=True):
+    """``(status, order_count, revenue)`` rows for the window."""
+    query = db.session.query(
+        Order.status, func.count(Order.id), func.sum(Order.total_amount)
+    )
+    return _window(query, start, end, end_inclusive).group_by(Order.status)
+
+def product_breakdown(start=None, end=None, end_inclusive=True, limit=None):
+    """``(product_id, quantity, revenue)`` rows, highest revenue first."""
+    revenue = _line_revenue()
+    query = db.session.query(
+        OrderItem.product_id, func.sum(OrderItem.quantity), revenue
+    ).join(Order, Order.id == OrderItem.order_id)
+    query = _window(query, start, end, end_inclusive).group_by(OrderItem.product_id)
+    query = query.order_by(revenue.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+def top_products(start=None, end=None, limit=10):
+    """Best selling products by revenue, with names resolved in the same query."""
+    revenue = _line_revenue()
+    query = db.session.query(
+        OrderItem.product_id, Product.name, func.sum(OrderItem.quantity), revenue
+    ).join(Order, Order.id == OrderItem.order_id).outerjoin(
+        Product, Product.id == OrderItem.product_id
+    )
+    query = _window(query, start, end).group_by(OrderItem.product_id, Product.name)
+    return [
+        {
+            'name': name or f"Product {product_id}",
+            'quantity': int(quantity or 0),
+            'revenue': float(total or 0)
+        }
+        for product_id, name, quantity, total in query.order_by(revenue.desc()).limit(limit)
+    ]
+
+def revenue_by_category(start=None, end=None):
+    revenue = _line_revenue()
+    query = db.session.query(
+        Category.id, Category.name, func.count(func.distinct(Order.id)),
+        func.sum(OrderItem.quantity), revenue
+    ).select_from(OrderItem).join(
+        Order, Order.id == OrderItem.order_id
+    ).outerjoin(
+        Product, Product.id == OrderItem.product_id
+    ).outerjoin(
+        Category, Category.id == Product.category_id
+    )
+    query = _window(query, start, end).group_by(Category.id, Category.name)
+    return [
+        {
+            'category_id': category_id,
+            'category_name': name or 'Uncategorized',
+            'orders': orders,
+            'quantity': int(quantity or 0),
+            'revenue': float(total or 0)
+        }
+        for category_id, name, orders, quantity, total in query.order_by(revenue.desc())
+    ]
+
+def revenue_by_day(start=None, end=None):
+    day = func.date(Order.created_at)
+    query = db.session.query(day, func.count(Order.id), func.sum(Order.total_amount))
+    query = _window(query, start, end).group_by(day)
+    results = []
+    for value, orders, total in query.order_by(day):
+        # func.date() comes back as a string on SQLite and a date on MySQL
+        results.append({
+            'date': value.isoformat() if isinstance(value, date) else str(value),
+            'orders': orders,
+            'revenue': float(total or 0)
+        })
+    return results
+
+def sales_overview(start=None, end=None, top_limit=10):
+    """The sales analytics payload computed straight from the order tables."""
+    status_counts = {}
+    total_revenue = 0.0
+    for status, count, revenue in status_breakdown(start, end):
+        status_counts[status] = count
+        total_revenue += float(revenue or 0)
+    total_orders = sum(status_counts.values())
+    
+    return {
+        'total_orders': total_orders,
+        'total_revenue': total_revenue,
+        'average_order_value': total_revenue / total_orders if total_orders > 0 else 0,
+        'orders_by_status': status_counts,
+        'top_products': top_products(start, end, limit=top_limit)
+    }
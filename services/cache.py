@@ -0,0 +1,112 @@
+"""A small thread-safe LRU cache with per-entry expiry."""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire ``ttl`` seconds after being set.
+    
+    Keys are tuples whose first element is a namespace, so related entries can
+    be dropped together with :meth:`invalidate_namespace`. A ``maxsize`` of 0
+    disables caching entirely while keeping the counters. Every invalidation
+    bumps a per-namespace generation so a value built concurrently from
+    pre-invalidation data is never stored by :meth:`get_or_set`.
+    """
+    
+    def __init__(self, maxsize=1024, ttl=60, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._generations = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+    
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, ttl)
+    
+    def _store(self, key, value, ttl):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+    
+    def _generation(self, namespace):
+        return self._epoch, self._generations.get(namespace, 0)
+    
+    def get_or_set(self, key, builder, ttl=None):
+        """Return the cached value for ``key``, building and storing it on a miss.
+        
+        A builder result of ``None`` is returned but not cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            with self._lock:
+                generation = self._generation(key[0])
+            value = builder()
+            if value is not None:
+                with self._lock:
+                    if self._generation(key[0]) == generation:
+                        self._store(key, value, ttl)
+        return value
+    
+    def _bump(self, namespace):
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+    
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._bump(key[0])
+                if self._data.pop(key, _MISSING) is not _MISSING:
+                    self.invalidations += 1
+    
+    def invalidate_namespace(self, namespace):
+        with self._lock:
+            self._bump(namespace)
+            stale = [key for key in self._data if key[0] == namespace]
+            for key in stale:
+                del self._data[key]
+            self.invalidations += len(stale)
+    
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
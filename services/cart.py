@@ -0,0 +1,398 @@
+"""Cart storage and read model.
+
+Carts are addressed by key: ``user:<id>`` for a signed-in customer and
+``session:<id>`` for an anonymous cart identified by the ``X-Cart-Session``
+header, which is merged into the customer's cart when they log in or
+register. With ``CART_STORE=database`` every change is written to
+``cart_items`` in the request's transaction. With ``CART_STORE=memory``
+carts are held in a :class:`~services.cart_store.MemoryCartStore` and a
+background thread writes the changed ones to ``cart_items`` every
+``CART_FLUSH_INTERVAL`` seconds and at shutdown, so a cart click costs no
+database write. The memory store is per process: run one worker process
+(any number of threads) with it.
+
+Either way the cart payload is built from one query, joining the cart lines
+with the product columns they display when the lines come from the database.
+Batches of add/set/remove operations are checked against one product query
+and saved as one change to the cart.
+"""
+import atexit
+import re
+import secrets
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import insert, update, delete, select, func, bindparam
+from models.database import db
+from models.order import CartItem
+from models.product import Product
+from services.cart_store import MemoryCartStore
+from services.inventory import InsufficientStock, UnknownProducts
+
+EXTENSION_KEY = 'cart_store'
+
+SESSION_HEADER = 'X-Cart-Session'
+
+_SESSION_ID = re.compile(r'^[A-Za-z0-9_-]{16,128}$')
+
+OPERATIONS = ('add', 'set', 'remove')
+
+# Most operations accepted in one batch request
+MAX_OPERATIONS = 100
+
+_PRODUCT_COLUMNS = (Product.name, Product.price, Product.stock_quantity, Product.is_active)
+
+class InvalidCartSession(ValueError):
+    """The ``X-Cart-Session`` header isn't a session id this app could have issued."""
+
+def user_cart(user_id):
+    return f'user:{user_id}'
+
+def session_cart(session_id):
+    return f'session:{session_id}'
+
+def session_id_of(key):
+    """The anonymous session id of a cart key, or None for a customer's cart."""
+    kind, _, value = key.partition(':')
+    return value if kind == 'session' else None
+
+def _owner(key):
+    """``(column name, value)`` identifying a cart's ``cart_items`` rows."""
+    kind, _, value = key.partition(':')
+    if kind == 'user':
+        return 'user_id', int(value)
+    return 'session_id', value
+
+def _owned_by(key):
+    name, value = _owner(key)
+    return getattr(CartItem, name) == value
+
+def _header_session():
+    session_id = request.headers.get(SESSION_HEADER)
+    if session_id and not _SESSION_ID.match(session_id):
+        raise InvalidCartSession(f'Invalid {SESSION_HEADER}')
+    return session_id
+
+def request_cart(create=False):
+    """Key of the cart the current request works on, or None.
+    
+    A valid JWT selects the customer's cart, otherwise the anonymous cart
+    named by ``X-Cart-Session``. With ``create`` a new anonymous cart is
+    started when there is neither.
+    """
+    identity = get_jwt_identity()
+    if identity:
+        return user_cart(int(identity))
+    session_id = _header_session()
+    if session_id:
+        return session_cart(session_id)
+    if create:
+        return session_cart(secrets.token_urlsafe(24))
+    return None
+
+def cart_store():
+    """The app's :class:`~services.cart_store.CartStore`, or None when carts live in the database."""
+    return current_app.extensions.get(EXTENSION_KEY)
+
+def _read_lines(key):
+    lines = {}
+    rows = db.session.query(CartItem.product_id, CartItem.quantity).filter(_owned_by(key)).order_by(CartItem.id)
+    for product_id, quantity in rows:
+        lines[product_id] = lines.get(product_id, 0) + quantity
+    return lines
+
+def load_cart(key):
+    """The cart's ``{product_id: quantity}`` lines, in the order they were added."""
+    store = cart_store()
+    lines = store.get(key) if store is not None else None
+    if lines is None:
+        lines = _read_lines(key)
+        if store is not None:
+            store.hold(key, lines)
+    return lines
+
+def cart_product_rows(product_ids):
+    """Product rows for the cart payload keyed by id, from one IN query."""
+    if not product_ids:
+        return {}
+    rows = db.session.query(Product.id, *_PRODUCT_COLUMNS).filter(Product.id.in_(product_ids))
+    return {row.id: row for row in rows}
+
+def cart_products(key):
+    """``(lines, products)`` for a cart, with ``products`` keyed by id.
+    
+    The product rows carry ``name``, ``price``, ``stock_quantity`` and
+    ``is_active``; lines whose product no longer exists have no row.
+    """
+    store = cart_store()
+    lines = store.get(key) if store is not None else None
+    if lines is not None:
+        return lines, cart_product_rows(lines)
+    
+    rows = db.session.query(
+        CartItem.product_id, CartItem.quantity, Product.id, *_PRODUCT_COLUMNS
+    ).outerjoin(Product, Product.id == CartItem.product_id).filter(_owned_by(key)).order_by(CartItem.id)
+    lines, products = {}, {}
+    for row in rows:
+        lines[row.product_id] = lines.get(row.product_id, 0) + row.quantity
+        if row.id is not None:
+            products[row.product_id] = row
+    if store is not None:
+        store.hold(key, lines)
+    return lines, products
+
+def save_cart(key, before, after):
+    """Store the cart's new lines; ``before`` is what :func:`load_cart` returned.
+    
+    Without a cart store only the lines that changed are written, in the
+    caller's transaction.
+    """
+    store = cart_store()
+    if store is not None:
+        store.set(key, after)
+        return
+    
+    name, value = _owner(key)
+    removed = [product_id for product_id in before if product_id not in after]
+    if removed:
+        db.session.execute(delete(CartItem).where(_owned_by(key), CartItem.product_id.in_(removed)))
+    now = datetime.utcnow()
+    added = [
+        {name: value, 'product_id': product_id, 'quantity': quantity, 'created_at': now}
+        for product_id, quantity in after.items() if product_id not in before
+    ]
+    if added:
+        db.session.execute(insert(CartItem), added)
+    changed = [
+        {'line_product': product_id, 'line_quantity': quantity}
+        for product_id, quantity in after.items() if product_id in before and before[product_id] != quantity
+    ]
+    if changed:
+        db.session.execute(_set_quantity(key), changed)
+
+def _set_quantity(key):
+    table = CartItem.__table__
+    name, value = _owner(key)
+    return update(table).where(
+        table.c[name] == value, table.c.product_id == bindparam('line_product')
+    ).values(quantity=bindparam('line_quantity'))
+
+def apply_operations(lines, operations, products):
+    """The cart lines after ``[(op, product_id, quantity)]``, applied in order.
+    
+    ``products`` must hold the rows of every product the operations name
+    (:func:`cart_product_rows`). ``add`` and ``set`` need an active product and
+    ``set`` to 0 removes the line, as does ``remove``. Raises UnknownProducts
+    or InsufficientStock, checked against the final quantities, and then
+    nothing is applied.
+    """
+    updated = dict(lines)
+    unknown, touched = set(), set()
+    for op, product_id, quantity in operations:
+        if op == 'remove' or (op == 'set' and quantity == 0):
+            updated.pop(product_id, None)
+            continue
+        product = products.get(product_id)
+        if product is None or not product.is_active:
+            unknown.add(product_id)
+            continue
+        updated[product_id] = quantity if op == 'set' else updated.get(product_id, 0) + quantity
+        touched.add(product_id)
+    
+    if unknown:
+        raise UnknownProducts(sorted(unknown))
+    for product_id in sorted(touched):
+        if updated.get(product_id, 0) > products[product_id].stock_quantity:
+            raise InsufficientStock(product_id)
+    return updated
+
+def write_carts(changes):
+    """Replace the ``cart_items`` rows of every cart in ``{key: lines}``; the caller commits."""
+    owners = {'user_id': [], 'session_id': []}
+    rows = []
+    now = datetime.utcnow()
+    for key, lines in changes.items():
+        name, value = _owner(key)
+        owners[name].append(value)
+        rows += [
+            {name: value, 'product_id': product_id, 'quantity': quantity, 'created_at': now}
+            for product_id, quantity in lines.items()
+        ]
+    for name, values in owners.items():
+        if values:
+            db.session.execute(delete(CartItem).where(getattr(CartItem, name).in_(values)))
+    if rows:
+        db.session.execute(insert(CartItem), [
+            {'user_id': None, 'session_id': None, **row} for row in rows
+        ])
+
+def discard_cart(key):
+    """Forget a cart whose rows the caller's committed transaction deleted."""
+    store = cart_store()
+    if store is not None:
+        store.set(key, {})
+
+def purge_session_carts(max_age):
+    """Delete anonymous carts with no change in ``max_age`` seconds; returns the lines deleted."""
+    cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+    touched = func.coalesce(CartItem.updated_at, CartItem.created_at)
+    stale = [
+        session_id for session_id, in db.session.query(CartItem.session_id)
+        .filter(CartItem.session_id.isnot(None))
+        .group_by(CartItem.session_id)
+        .having(func.max(touched) < cutoff)
+    ]
+    # Re-checked in the DELETE so a cart changed since the scan is kept
+    active = select(CartItem.session_id).where(CartItem.session_id.isnot(None), touched >= cutoff)
+    purged = 0
+    for start in range(0, len(stale), 500):
+        purged += db.session.execute(delete(CartItem).where(
+            CartItem.session_id.in_(stale[start:start + 500]), CartItem.session_id.notin_(active)
+        ), execution_options={'synchronize_session': False}).rowcount
+    db.session.commit()
+    return purged
+
+def merge_session_cart(user_id):
+    """Move the request's anonymous cart, if any, into ``user_id``'s cart; the caller commits."""
+    session_id = request.headers.get(SESSION_HEADER)
+    if not session_id or not _SESSION_ID.match(session_id):
+        return False
+    source = session_cart(session_id)
+    source_lines = load_cart(source)
+    if not source_lines:
+        return False
+    
+    target = user_cart(user_id)
+    before = load_cart(target)
+    after = dict(before)
+    for product_id, quantity in source_lines.items():
+        after[product_id] = after.get(product_id, 0) + quantity
+    save_cart(target, before, after)
+    save_cart(source, source_lines, {})
+    return True
+
+def cart_view(key):
+    """``{'cart_items': [...], 'total_amount': float}`` for the cart ``key``.
+    
+    Line ids are product ids, which is what the cart update and delete
+    endpoints take.
+    """
+    lines, products = cart_products(key)
+    return cart_payload(key, lines, products)
+
+def cart_payload(key, lines, products):
+    """The :func:`cart_view` payload for lines whose product rows are already loaded."""
+    name, value = _owner(key)
+    user_id = value if name == 'user_id' else None
+    
+    items = []
+    total = Decimal('0')
+    for product_id, quantity in lines.items():
+        product = products.get(product_id)
+        price = product.price if product is not None else None
+        line_total = price * quantity if price is not None else Decimal('0')
+        total += line_total
+        items.append({
+            'id': product_id,
+            'user_id': user_id,
+            'product_id': product_id,
+            'product_name': product.name if product is not None else None,
+            'product_price': float(price) if price is not None else 0,
+            'quantity': quantity,
+            'total_price': float(line_total),
+            'stock_quantity': product.stock_quantity if product is not None else 0
+        })
+    
+    return {'cart_items': items, 'total_amount': float(total)}
+
+def flush_carts(store):
+    """Write the store's changed carts in one transaction; returns how many."""
+    changes = store.drain()
+    if not changes:
+        return 0
+    try:
+        write_carts(changes)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        store.release(changes, written=False)
+        raise
+    store.release(changes, written=True)
+    return len(changes)
+
+class CartFlusher:
+    """Background thread writing a store's changed carts behind."""
+    
+    def __init__(self, app, store, interval):
+        self.app = app
+        self.store = store
+        self.interval = interval
+        self.flushed = 0
+        self._stopping = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='cart-flusher', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+    
+    def flush(self):
+        with self.app.app_context():
+            self.flushed += flush_carts(self.store)
+    
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception('Cart flush failed; retrying next interval')
+    
+    def stop(self, timeout=5):
+        """Stop the thread and write whatever is still pending."""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+        try:
+            self.flush()
+        except Exception:
+            self.app.logger.exception('Final cart flush failed')
+    
+    def metric_lines(self):
+        stats = self.store.stats()
+        return [
+            '# HELP cart_store_carts Carts held in the cart store.',
+            '# TYPE cart_store_carts gauge',
+            f"cart_store_carts {stats['carts']}",
+            '# HELP cart_store_unflushed Carts with changes not yet written to the database.',
+            '# TYPE cart_store_unflushed gauge',
+            f"cart_store_unflushed {stats['unflushed']}",
+            '# HELP cart_store_flushed_total Carts written to the database by this process.',
+            '# TYPE cart_store_flushed_total counter',
+            f'cart_store_flushed_total {self.flushed}'
+        ]
+
+def init_carts(app):
+    backend = app.config.get('CART_STORE', 'database')
+    if backend not in ('database', 'memory'):
+        raise RuntimeError(f'Unknown CART_STORE {backend!r}; use database or memory')
+    if backend == 'database':
+        return None
+    
+    store = MemoryCartStore(
+        maxsize=app.config.get('CART_STORE_SIZE', 10000),
+        ttl=app.config.get('CART_STORE_TTL', 1800)
+    )
+    app.extensions[EXTENSION_KEY] = store
+    flusher = CartFlusher(app, store, app.config.get('CART_FLUSH_INTERVAL', 5))
+    app.extensions['cart_flusher'] = flusher
+    
+    metrics = app.extensions.get('instrumentation')
+    if metrics is not None:
+        metrics.collectors.append(flusher.metric_lines)
+    
+    flusher.start()
+    return store
@@ -0,0 +1,123 @@
+"""Pluggable storage for hot shopping carts.
+
+A cart is a ``{product_id: quantity}`` mapping kept under a string key
+(``user:<id>``, or ``session:<id>`` for anonymous carts); ``cart_items`` is
+the durable copy written by :mod:`services.cart`. A backend implements
+:class:`CartStore`. The operations map onto a key-value server, one small
+value per key plus a set of changed keys (GET/SET and SADD/SPOP on a
+Redis-like store), so a shared server can replace the process-local
+:class:`MemoryCartStore`.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+class CartStore:
+    """Interface of a cart backend; every method must be thread-safe."""
+    
+    def get(self, key):
+        """The lines held for ``key``, or None when the store doesn't hold that cart."""
+        raise NotImplementedError
+    
+    def hold(self, key, lines):
+        """Keep a clean copy of a cart just read from the database."""
+        raise NotImplementedError
+    
+    def set(self, key, lines):
+        """Replace a cart and mark it for the next flush."""
+        raise NotImplementedError
+    
+    def drain(self):
+        """Take the carts changed since the last drain as ``{key: lines}``."""
+        raise NotImplementedError
+    
+    def release(self, changes, written):
+        """Finish a drain; carts that weren't ``written`` are marked changed again."""
+        raise NotImplementedError
+
+class MemoryCartStore(CartStore):
+    """Process-local LRU of carts; unchanged carts expire ``ttl`` seconds after last use.
+    
+    Carts with changes that haven't reached the database are never evicted
+    or expired, so ``maxsize`` is exceeded rather than losing a change.
+    """
+    
+    def __init__(self, maxsize=10000, ttl=1800, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._carts = OrderedDict()
+        self._dirty = set()
+        self._flushing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _pinned(self, key):
+        return key in self._dirty or key in self._flushing
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._carts.get(key)
+            if entry is not None and (entry[0] <= self._clock() and not self._pinned(key)):
+                del self._carts[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._carts[key] = (self._clock() + self.ttl, entry[1])
+            self._carts.move_to_end(key)
+            return dict(entry[1])
+    
+    def _put(self, key, lines):
+        self._carts[key] = (self._clock() + self.ttl, dict(lines))
+        self._carts.move_to_end(key)
+        self._evict()
+    
+    def _evict(self):
+        if len(self._carts) <= self.maxsize:
+            return
+        for key in list(self._carts):
+            if len(self._carts) <= self.maxsize:
+                break
+            if not self._pinned(key):
+                del self._carts[key]
+                self.evictions += 1
+    
+    def hold(self, key, lines):
+        with self._lock:
+            # A pending change is newer than anything read from the database
+            if not self._pinned(key):
+                self._put(key, lines)
+    
+    def set(self, key, lines):
+        with self._lock:
+            self._dirty.add(key)
+            self._put(key, lines)
+    
+    def drain(self):
+        with self._lock:
+            changes = {key: dict(self._carts[key][1]) for key in self._dirty}
+            self._flushing.update(self._dirty)
+            self._dirty.clear()
+            return changes
+    
+    def release(self, changes, written):
+        with self._lock:
+            self._flushing.difference_update(changes)
+            if not written:
+                # The held lines are still the newest; write them next time
+                self._dirty.update(changes)
+            self._evict()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'carts': len(self._carts),
+                'unflushed': len(self._dirty) + len(self._flushing),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
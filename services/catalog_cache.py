@@ -0,0 +1,58 @@
+"""Process-local cache for the public catalog endpoints.
+
+Entries hold the JSON-ready payloads of ``get_products``, ``get_product`` and
+``get_categories``. The admin catalog write paths invalidate exactly the
+namespaces they affect; stock changes from checkout only drop the detail
+entries of the purchased products and otherwise age out with the TTL.
+"""
+from flask import current_app, request
+from services.cache import TTLCache
+
+EXTENSION_KEY = 'catalog_cache'
+
+PRODUCT_LIST = 'product_list'
+PRODUCT = 'product'
+CATEGORIES = 'categories'
+
+def init_catalog_cache(app):
+    cache = TTLCache(
+        maxsize=app.config.get('CATALOG_CACHE_SIZE', 1024),
+        ttl=app.config.get('CATALOG_CACHE_TTL', 60)
+    )
+    app.extensions[EXTENSION_KEY] = cache
+    return cache
+
+def catalog_cache():
+    return current_app.extensions[EXTENSION_KEY]
+
+def product_list_key():
+    """Key a listing by its full, order-independent query string."""
+    return (PRODUCT_LIST,) + tuple(sorted(request.args.items(multi=True)))
+
+def product_key(product_id):
+    return (PRODUCT, product_id)
+
+def categories_key():
+    return (CATEGORIES,)
+
+def invalidate_products(*product_ids):
+    """Drop the cached listings and the detail entries of ``product_ids``."""
+    cache = catalog_cache()
+    cache.invalidate_namespace(PRODUCT_LIST)
+    cache.invalidate(*(product_key(product_id) for product_id in product_ids))
+
+def invalidate_all_products():
+    """Drop every listing and detail entry, for writes touching many products."""
+    cache = catalog_cache()
+    cache.invalidate_namespace(PRODUCT_LIST)
+    cache.invalidate_namespace(PRODUCT)
+
+def invalidate_product_details(*product_ids):
+    catalog_cache().invalidate(*(product_key(product_id) for product_id in product_ids))
+
+def invalidate_categories():
+    """Drop categories and every product payload, which embed category names."""
+    cache = catalog_cache()
+    cache.invalidate_namespace(CATEGORIES)
+    cache.invalidate_namespace(PRODUCT_LIST)
+    cache.invalidate_namespace(PRODUCT)
@@ -0,0 +1,286 @@
+"""Bulk catalog import and export.
+
+Imports read CSV (header row) or JSON Lines incrementally from the upload
+stream, validate each row against the category map loaded once up front,
+and write ``IMPORT_BATCH_SIZE`` rows per transaction with one executemany
+INSERT for new products and one for updates. A row with an ``id`` updates
+that product, changing only the fields it gives (empty CSV cells and JSON
+nulls count as not given); a row without one creates a product. Invalid
+rows are reported by line number and never stop the import. Exports walk
+the catalog in id order a chunk at a time, so neither direction holds the
+whole catalog in memory.
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from flask import current_app
+from sqlalchemy import insert, update
+from models.database import db
+from models.product import Product, Category
+from services.serializers import project_products
+
+FORMATS = ('csv', 'jsonl')
+
+MIMETYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+_UPLOAD_TYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/x-jsonlines': 'jsonl'
+}
+
+EXPORT_FIELDS = (
+    'id', 'name', 'description', 'price', 'category_id', 'category_name',
+    'stock_quantity', 'image_url', 'is_active'
+)
+
+# Most per-row errors returned in one response; the failed count stays exact
+MAX_REPORTED_ERRORS = 1000
+
+# Largest price the Numeric(10, 2) column holds
+MAX_PRICE = Decimal('99999999.99')
+
+class RowError(ValueError):
+    """A row that can't be imported; the message is reported to the client."""
+
+def upload_format(filename, mimetype):
+    """Guess the format of an upload from its file name or content type."""
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    if extension in ('csv', 'jsonl', 'ndjson'):
+        return 'csv' if extension == 'csv' else 'jsonl'
+    return _UPLOAD_TYPES.get(mimetype)
+
+def _text(stream):
+    return io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+def read_rows(stream, fmt):
+    """Yield ``(line, row)`` from an upload; ``row`` is a RowError for unparsable lines."""
+    text = _text(stream)
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line, raw in enumerate(text, 1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError as e:
+            yield line, RowError(f'Invalid JSON: {e}')
+            continue
+        yield line, row if isinstance(row, dict) else RowError('Each line must be a JSON object')
+
+def _given(row, field):
+    value = row.get(field)
+    if isinstance(value, str):
+        value = value.strip()
+    return None if value in (None, '') else value
+
+def _integer(value, field, minimum):
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise RowError(f'{field} must be an integer')
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        raise RowError(f'{field} must be an integer')
+    if number < minimum:
+        raise RowError(f'{field} must be at least {minimum}')
+    return number
+
+def _boolean(value, field):
+    if isinstance(value, bool):
+        return value
+    flag = str(value).lower()
+    if flag in ('1', 'true', 'yes', 'y'):
+        return True
+    if flag in ('0', 'false', 'no', 'n'):
+        return False
+    raise RowError(f'{field} must be true or false')
+
+def _string(value, field, length=None):
+    value = str(value)
+    if length and len(value) > length:
+        raise RowError(f'{field} is longer than {length} characters')
+    return value
+
+def clean_row(row, categories):
+    """Validate one input row into Product column values.
+    
+    ``categories`` maps category ids to themselves and lower-cased names to
+    ids, so rows may give either ``category_id`` or ``category_name``.
+    """
+    values = {}
+    if _given(row, 'id') is not None:
+        values['id'] = _integer(_given(row, 'id'), 'id', 1)
+    if _given(row, 'name') is not None:
+        values['name'] = _string(_given(row, 'name'), 'name', 200)
+    if _given(row, 'description') is not None:
+        values['description'] = _string(_given(row, 'description'), 'description')
+    if _given(row, 'price') is not None:
+        try:
+            price = Decimal(str(_given(row, 'price'))).quantize(Decimal('0.01'))
+            valid = 0 < price <= MAX_PRICE
+        except InvalidOperation:
+            raise RowError('price must be a number')
+        if not valid:
+            raise RowError(f'price must be between 0.01 and {MAX_PRICE}')
+        values['price'] = price
+    if _given(row, 'category_id') is not None:
+        category_id = _integer(_given(row, 'category_id'), 'category_id', 1)
+        if category_id not in categories:
+            raise RowError(f'Category {category_id} not found')
+        values['category_id'] = category_id
+    elif _given(row, 'category_name') is not None:
+        name = str(_given(row, 'category_name')).lower()
+        if name not in categories:
+            raise RowError(f"Category '{_given(row, 'category_name')}' not found")
+        values['category_id'] = categories[name]
+    if _given(row, 'stock_quantity') is not None:
+        values['stock_quantity'] = _integer(_given(row, 'stock_quantity'), 'stock_quantity', 0)
+    if _given(row, 'image_url') is not None:
+        values['image_url'] = _string(_given(row, 'image_url'), 'image_url', 500)
+    if _given(row, 'is_active') is not None:
+        values['is_active'] = _boolean(_given(row, 'is_active'), 'is_active')
+    
+    if 'id' not in values:
+        for field in ('name', 'price', 'category_id'):
+            if field not in values:
+                raise RowError(f'{field} is required')
+    elif len(values) == 1:
+        raise RowError('Nothing to update')
+    return values
+
+def _category_map():
+    categories = {}
+    for category_id, name in db.session.query(Category.id, Category.name):
+        categories[category_id] = category_id
+        categories.setdefault(name.lower(), category_id)
+    return categories
+
+class CatalogImport:
+    """Runs one import and collects its counts and row errors."""
+    
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+        self.stream_error = None
+    
+    def _error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+    
+    def run(self, rows):
+        categories = _category_map()
+        batch = []
+        try:
+            for line, row in rows:
+                try:
+                    if isinstance(row, RowError):
+                        raise row
+                    batch.append((line, clean_row(row, categories)))
+                except RowError as e:
+                    self._error(line, str(e))
+                if len(batch) >= self.batch_size:
+                    self._write(batch)
+                    batch = []
+        except (UnicodeDecodeError, csv.Error) as e:
+            # The rest of the upload is unreadable; keep what was read so far
+            self.stream_error = f'Unreadable upload: {e}'
+        if batch:
+            self._write(batch)
+        return self
+    
+    def _write(self, batch):
+        wanted = {values['id'] for _, values in batch if 'id' in values}
+        existing = set()
+        if wanted:
+            existing = {
+                product_id for product_id, in
+                db.session.query(Product.id).filter(Product.id.in_(wanted))
+            }
+        
+        now = datetime.utcnow()
+        creates, updates, written = [], [], []
+        for line, values in batch:
+            if 'id' not in values:
+                creates.append({
+                    'description': None, 'stock_quantity': 0, 'image_url': None, 'is_active': True,
+                    **values, 'created_at': now, 'updated_at': now
+                })
+            elif values['id'] in existing:
+                updates.append({**values, 'updated_at': now})
+            else:
+                self._error(line, f"Product {values['id']} not found")
+                continue
+            written.append(line)
+        
+        try:
+            if creates:
+                db.session.execute(insert(Product), creates)
+            if updates:
+                db.session.execute(update(Product), updates)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            for line in written:
+                self._error(line, f'Batch failed: {e}')
+            return
+        self.created += len(creates)
+        self.updated += len(updates)
+    
+    def summary(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+            'errors_truncated': self.failed > len(self.errors),
+            'stream_error': self.stream_error
+        }
+
+def import_catalog(stream, fmt):
+    """Import an uploaded CSV/JSONL stream; returns the finished :class:`CatalogImport`."""
+    batch_size = current_app.config.get('IMPORT_BATCH_SIZE', 500)
+    return CatalogImport(batch_size).run(read_rows(stream, fmt))
+
+def _export_chunks(query, chunk_size):
+    last_id = 0
+    while True:
+        rows = project_products(query).filter(Product.id > last_id).order_by(Product.id).limit(chunk_size).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield rows
+
+def _export_record(row):
+    record = {field: getattr(row, field) for field in EXPORT_FIELDS}
+    record['price'] = float(row.price)
+    return record
+
+def export_catalog(query, fmt, chunk_size=1000):
+    """Generate the products matched by ``query`` as CSV or JSONL text chunks."""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        for rows in _export_chunks(query, chunk_size):
+            for row in rows:
+                record = _export_record(row)
+                record['is_active'] = 'true' if row.is_active else 'false'
+                writer.writerow(record.values())
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+        return
+    dumps = current_app.json.dumps
+    for rows in _export_chunks(query, chunk_size):
+        yield ''.join(dumps(_export_record(row)) + '\n' for row in rows)
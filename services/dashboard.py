@@ -0,0 +1,109 @@
+"""Headline numbers for the admin dashboard.
+
+The whole dashboard is one payload built from a fixed set of five queries:
+catalog and user counts as scalar subqueries of a single SELECT, order counts
+and revenue per status from the ``daily_sales_summary`` rollup, the latest
+orders by ``created_at`` and the two queries of the inventory report. The
+payload is cached for ``DASHBOARD_CACHE_TTL`` seconds, so concurrent admins
+and reloads share one build and the figures may lag writes by that long.
+"""
+from datetime import datetime
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import select, func
+from models.database import db
+from models.analytics import DailySalesSummary
+from models.order import Order
+from models.product import Product
+from models.user import User
+from services.cache import TTLCache
+from services.inventory_report import inventory_report
+
+EXTENSION_KEY = 'dashboard_cache'
+
+DASHBOARD = 'dashboard'
+
+RECENT_ORDERS = 5
+
+LOW_STOCK_PRODUCTS = 5
+
+def init_dashboard_cache(app):
+    # One payload; a TTL of 0 stores nothing and rebuilds on every request
+    ttl = app.config.get('DASHBOARD_CACHE_TTL', 10)
+    cache = TTLCache(maxsize=1 if ttl > 0 else 0, ttl=ttl)
+    app.extensions[EXTENSION_KEY] = cache
+    return cache
+
+def dashboard_cache():
+    return current_app.extensions[EXTENSION_KEY]
+
+def _count(*criteria):
+    query = select(func.count()).select_from(criteria[0])
+    return query.where(*criteria[1:]).scalar_subquery()
+
+def _headline_counts():
+    return db.session.query(
+        _count(Product).label('products'),
+        _count(Product, Product.is_active == True).label('active_products'),
+        _count(User).label('users')
+    ).one()
+
+def _orders_by_status():
+    rows = db.session.query(
+        DailySalesSummary.status,
+        func.sum(DailySalesSummary.order_count), func.sum(DailySalesSummary.revenue)
+    ).group_by(DailySalesSummary.status)
+    
+    by_status = {}
+    revenue = Decimal('0')
+    for status, count, status_revenue in rows:
+        if count:
+            by_status[status] = int(count)
+        revenue += Decimal(str(status_revenue or 0))
+    return by_status, float(revenue)
+
+def _recent_orders():
+    rows = db.session.query(
+        Order.id, Order.user_id, Order.total_amount, Order.status, Order.created_at
+    ).order_by(Order.created_at.desc()).limit(RECENT_ORDERS)
+    return [
+        {
+            'id': row.id,
+            'user_id': row.user_id,
+            'total_amount': float(row.total_amount),
+            'status': row.status,
+            'created_at': row.created_at.isoformat() if row.created_at else None
+        }
+        for row in rows
+    ]
+
+def build_dashboard():
+    counts = _headline_counts()
+    by_status, revenue = _orders_by_status()
+    total_orders = sum(by_status.values())
+    inventory = inventory_report(
+        current_app.config.get('LOW_STOCK_THRESHOLD', 10),
+        days=current_app.config.get('INVENTORY_VELOCITY_DAYS', 30),
+        limit=LOW_STOCK_PRODUCTS
+    )
+    return {
+        'products': {'total': counts.products, 'active': counts.active_products},
+        'users': {'total': counts.users},
+        'orders': {
+            'total': total_orders,
+            'revenue': revenue,
+            'average_order_value': revenue / total_orders if total_orders > 0 else 0,
+            'by_status': by_status
+        },
+        'recent_orders': _recent_orders(),
+        'low_stock': {
+            'count': inventory['low_stock'],
+            'out_of_stock': inventory['out_of_stock'],
+            'products': inventory['products']
+        },
+        'generated_at': datetime.utcnow().isoformat()
+    }
+
+def dashboard_summary():
+    """The cached dashboard payload, rebuilt at most every ``DASHBOARD_CACHE_TTL`` seconds."""
+    return dashboard_cache().get_or_set((DASHBOARD,), build_dashboard)
@@ -0,0 +1,24 @@
+"""Per-connection engine settings that SQLALCHEMY_ENGINE_OPTIONS can't express."""
+from sqlalchemy import event
+
+def configure_engine(app, engine):
+    """Enable WAL and a busy timeout on every new SQLite connection.
+    
+    WAL lets readers proceed while a writer commits, and the busy timeout
+    makes a second writer wait for the lock instead of failing at once with
+    "database is locked". Other databases are left untouched.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    wal = app.config.get('SQLITE_WAL', True)
+    busy_timeout = int(app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'PRAGMA busy_timeout = {busy_timeout}')
+        if wal:
+            cursor.execute('PRAGMA journal_mode = WAL')
+            # Durable at checkpoints; the usual pairing with WAL
+            cursor.execute('PRAGMA synchronous = NORMAL')
+        cursor.close()
@@ -0,0 +1,53 @@
+"""HTTP conditional request helpers (ETag / Last-Modified).
+
+Endpoints compute their validators first and call :func:`not_modified` before
+doing any serialization work; a matching ``If-None-Match`` (or, without one,
+``If-Modified-Since``) short-circuits to an empty 304.
+"""
+import hashlib
+import json
+from collections import namedtuple
+from flask import request, jsonify, make_response
+
+# A cacheable JSON payload together with its validators
+Validated = namedtuple('Validated', ['payload', 'etag', 'last_modified'])
+
+def make_etag(*parts):
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return digest[:32]
+
+def payload_etag(payload):
+    raw = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:32]
+
+def _apply(response, etag, last_modified, cache_control):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def not_modified(etag, last_modified=None, cache_control='no-cache'):
+    """Return a 304 response if the client's copy is current, else None."""
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since and last_modified is not None:
+        fresh = last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+    else:
+        fresh = False
+    if not fresh:
+        return None
+    return _apply(make_response('', 304), etag, last_modified, cache_control)
+
+def validated_response(etag, last_modified, build, cache_control='no-cache'):
+    """Answer with 304 when possible, otherwise jsonify ``build()``."""
+    response = not_modified(etag, last_modified, cache_control)
+    if response is None:
+        response = _apply(make_response(jsonify(build()), 200), etag, last_modified, cache_control)
+    return response
+
+def respond(validated, cache_control='no-cache'):
+    """Serve a precomputed :class:`Validated` payload."""
+    return validated_response(
+        validated.etag, validated.last_modified, lambda: validated.payload, cache_control
+    )
@@ -0,0 +1,142 @@
+"""Idempotency-Key support for retried POST requests.
+
+The first request with a given key claims it by inserting a row (the unique
+constraint arbitrates concurrent retries), runs normally and stores its
+response. Retries with the same key and payload are answered from that row
+with one indexed lookup instead of re-running the transaction. Server errors
+and exceptions release the key so the client can try again, and a claim left
+behind by a crashed worker can be taken over once it is older than
+``IDEMPOTENCY_CLAIM_TIMEOUT`` seconds.
+"""
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, jsonify, make_response, current_app
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import update, func
+from sqlalchemy.exc import IntegrityError
+from models.database import db
+from models.idempotency import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+def _replay(record):
+    response = make_response(record.response_body, record.status_code)
+    response.mimetype = 'application/json'
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def _claim(user_id, key, fingerprint, now):
+    """Insert the in-progress marker; returns False if another request holds the key."""
+    ttl = timedelta(seconds=current_app.config.get('IDEMPOTENCY_KEY_TTL', 86400))
+    db.session.add(IdempotencyKey(
+        user_id=user_id, key=key, request_hash=fingerprint, created_at=now, claimed_at=now,
+        expires_at=now + ttl
+    ))
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        return False
+
+def _take_over(record, now):
+    """Claim a key whose holder stopped answering; False if another retry got it first."""
+    timeout = timedelta(seconds=current_app.config.get('IDEMPOTENCY_CLAIM_TIMEOUT', 60))
+    claimed_at = record.claimed_at or record.created_at
+    if claimed_at > now - timeout:
+        return False
+    taken = db.session.execute(
+        update(IdempotencyKey)
+        .where(
+            IdempotencyKey.id == record.id,
+            IdempotencyKey.status_code.is_(None),
+            func.coalesce(IdempotencyKey.claimed_at, IdempotencyKey.created_at) == claimed_at
+        )
+        .values(claimed_at=now)
+    ).rowcount
+    db.session.commit()
+    return taken == 1
+
+def _own_claim(user_id, key, now):
+    """The key's row if this request still holds its claim."""
+    return IdempotencyKey.query.filter_by(
+        user_id=user_id, key=key, status_code=None, claimed_at=now
+    ).first()
+
+def idempotent(f):
+    """Decorator making a JWT-protected POST endpoint honour Idempotency-Key.
+    
+    Keys are scoped to the user, so requests without a JWT (anonymous carts)
+    run without deduplication.
+    """
+    
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or get_jwt_identity() is None:
+            return f(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+        
+        user_id = int(get_jwt_identity())
+        fingerprint = _fingerprint()
+        # Whole seconds: the claim time identifies this request's claim and
+        # DATETIME columns on MySQL drop the microseconds
+        now = datetime.utcnow().replace(microsecond=0)
+        
+        record = IdempotencyKey.query.filter_by(user_id=user_id, key=key).first()
+        if record is not None and record.expires_at <= now:
+            db.session.delete(record)
+            db.session.commit()
+            record = None
+        
+        if record is not None:
+            if record.request_hash != fingerprint:
+                return jsonify({'error': f'{HEADER} was already used for a different request'}), 422
+            if record.status_code is not None:
+                return _replay(record)
+            if not _take_over(record, now):
+                return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+        elif not _claim(user_id, key, fingerprint, now):
+            return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+        
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            # Release the key so a retry runs the request instead of getting 409
+            db.session.rollback()
+            record = _own_claim(user_id, key, now)
+            if record is not None:
+                db.session.delete(record)
+                db.session.commit()
+            raise
+        
+        # A claim taken over after the timeout belongs to the newer request
+        record = _own_claim(user_id, key, now)
+        if record is not None:
+            if response.status_code >= 500:
+                # Let the client retry a failed attempt
+                db.session.delete(record)
+            else:
+                record.status_code = response.status_code
+                record.response_body = response.get_data(as_text=True)
+            db.session.commit()
+        
+        return response
+    
+    return decorated_function
+
+def purge_expired_keys():
+    """Delete stored responses whose retention window has passed."""
+    deleted = IdempotencyKey.query.filter(IdempotencyKey.expires_at <= datetime.utcnow()).delete()
+    db.session.commit()
+    return deleted
@@ -0,0 +1,42 @@
+"""Cached resolution of the user behind a JWT.
+
+The JWT user loader runs on every protected request. It resolves the token
+identity to a read-only snapshot (``User.to_dict()``) held in a short-TTL
+process cache, and Flask-JWT-Extended keeps that snapshot on the request
+context, so ``admin_required`` and the profile endpoint need no database
+round trip. Writes to a user call :func:`invalidate_user`; other worker
+processes see the change once the TTL lapses.
+"""
+from flask import current_app
+from flask_jwt_extended import get_current_user
+from models.user import User
+from services.cache import TTLCache
+
+EXTENSION_KEY = 'user_cache'
+NAMESPACE = 'user'
+
+def init_user_cache(app):
+    cache = TTLCache(
+        maxsize=app.config.get('USER_CACHE_SIZE', 10000),
+        ttl=app.config.get('USER_CACHE_TTL', 30)
+    )
+    app.extensions[EXTENSION_KEY] = cache
+    return cache
+
+def user_cache():
+    return current_app.extensions[EXTENSION_KEY]
+
+def _snapshot(user_id):
+    user = User.query.get(user_id)
+    return user.to_dict() if user else None
+
+def load_user_snapshot(user_id):
+    """The cached ``to_dict()`` of a user, or None if the user does not exist."""
+    return user_cache().get_or_set((NAMESPACE, int(user_id)), lambda: _snapshot(int(user_id)))
+
+def current_user_snapshot():
+    """The snapshot the JWT loader resolved for this request."""
+    return get_current_user()
+
+def invalidate_user(user_id):
+    user_cache().invalidate((NAMESPACE, int(user_id)))
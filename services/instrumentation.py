@@ -0,0 +1,190 @@
+"""Per-request SQL, serialization and latency instrumentation.
+
+:func:`init_instrumentation` hooks the engine and the request cycle: every
+statement is counted and timed against the current request, statements
+slower than ``SLOW_QUERY_MS`` are logged, and with ``SERVER_TIMING`` each
+response carries a ``Server-Timing`` header (``db``, ``serialize``,
+``total``). Per-route histograms are kept in process and exposed at
+``/metrics`` in the Prometheus text format to requests bearing
+``METRICS_TOKEN``. Model ``to_dict`` methods are wrapped with
+:func:`timed_serialization`.
+"""
+import functools
+import hmac
+import threading
+import time
+from flask import g, request, has_request_context, Response
+from sqlalchemy import event
+
+EXTENSION_KEY = 'instrumentation'
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+class Histogram:
+    """Cumulative Prometheus-style histogram keyed by a label tuple."""
+    
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.series = {}
+    
+    def observe(self, labels, value):
+        counts, total = self.series.get(labels, ([0] * (len(self.buckets) + 1), 0))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+        counts[-1] += 1
+        self.series[labels] = (counts, total + value)
+    
+    def render(self, name, label_names):
+        lines = []
+        for labels, (counts, total) in sorted(self.series.items()):
+            base = _labels(label_names, labels)
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                lines.append(f'{name}_bucket{{{base},le="{bound}"}} {count}')
+            lines.append(f'{name}_sum{{{base}}} {total:.6f}')
+            lines.append(f'{name}_count{{{base}}} {counts[-1]}')
+        return lines
+
+def _labels(names, values):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for value in values)
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+class RequestMetrics:
+    """Process-local request metrics; thread-safe."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.requests = {}
+        self.db_seconds = {}
+        self.serialize_seconds = {}
+        self.slow_queries = {}
+        # Callables returning extra exposition lines (e.g. job queue gauges)
+        self.collectors = []
+    
+    def record(self, route, status, elapsed, statements, db_time, serialize_time):
+        with self._lock:
+            self.duration.observe(route, elapsed)
+            self.statements.observe(route, statements)
+            key = route + (str(status),)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.db_seconds[route] = self.db_seconds.get(route, 0) + db_time
+            self.serialize_seconds[route] = self.serialize_seconds.get(route, 0) + serialize_time
+    
+    def slow_query(self, route):
+        with self._lock:
+            self.slow_queries[route] = self.slow_queries.get(route, 0) + 1
+    
+    def render(self):
+        route_labels = ('blueprint', 'endpoint', 'method')
+        with self._lock:
+            lines = [
+                '# HELP http_request_duration_seconds Request latency by route.',
+                '# TYPE http_request_duration_seconds histogram'
+            ]
+            lines += self.duration.render('http_request_duration_seconds', route_labels)
+            lines += [
+                '# HELP http_request_db_statements SQL statements issued per request.',
+                '# TYPE http_request_db_statements histogram'
+            ]
+            lines += self.statements.render('http_request_db_statements', route_labels)
+            lines += ['# HELP http_requests_total Requests by route and status.', '# TYPE http_requests_total counter']
+            lines += [
+                f'http_requests_total{{{_labels(route_labels + ("status",), key)}}} {count}'
+                for key, count in sorted(self.requests.items())
+            ]
+            for name, help_text, values in (
+                ('http_request_db_seconds_total', 'Time spent executing SQL.', self.db_seconds),
+                ('http_request_serialize_seconds_total', 'Time spent in model to_dict.', self.serialize_seconds),
+                ('db_slow_queries_total', 'Statements slower than SLOW_QUERY_MS.', self.slow_queries)
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                lines += [f'{name}{{{_labels(route_labels, key)}}} {value:g}' for key, value in sorted(values.items())]
+        for collector in self.collectors:
+            lines += collector()
+        return '\n'.join(lines) + '\n'
+
+def _route():
+    endpoint = request.endpoint if request.url_rule else 'unmatched'
+    return (request.blueprint or '', endpoint, request.method)
+
+def timed_serialization(to_dict):
+    """Add the time spent in a model's ``to_dict`` to the current request."""
+    @functools.wraps(to_dict)
+    def wrapper(*args, **kwargs):
+        if not has_request_context() or g.get('_serialize_depth'):
+            return to_dict(*args, **kwargs)
+        g._serialize_depth = 1
+        started = time.perf_counter()
+        try:
+            return to_dict(*args, **kwargs)
+        finally:
+            g._serialize_depth = 0
+            g.serialize_time = g.get('serialize_time', 0) + time.perf_counter() - started
+    return wrapper
+
+def init_instrumentation(app, engine):
+    metrics = RequestMetrics()
+    app.extensions[EXTENSION_KEY] = metrics
+    slow_query_seconds = app.config.get('SLOW_QUERY_MS', 200) / 1000
+    server_timing = app.config.get('SERVER_TIMING', False)
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+    
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_query_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        in_request = has_request_context()
+        if in_request:
+            g.sql_statements = g.get('sql_statements', 0) + 1
+            g.sql_time = g.get('sql_time', 0) + elapsed
+        if elapsed >= slow_query_seconds:
+            where = request.endpoint if in_request else 'outside request'
+            app.logger.warning('Slow query (%.1f ms) in %s: %s', elapsed * 1000, where, ' '.join(statement.split())[:500])
+            if in_request:
+                metrics.slow_query(_route())
+    
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+    
+    @app.after_request
+    def record_request(response):
+        started = g.get('request_started')
+        if started is None or request.endpoint in ('static', 'metrics'):
+            return response
+        elapsed = time.perf_counter() - started
+        statements = g.get('sql_statements', 0)
+        db_time = g.get('sql_time', 0)
+        serialize_time = g.get('serialize_time', 0)
+        metrics.record(_route(), response.status_code, elapsed, statements, db_time, serialize_time)
+        if server_timing:
+            response.headers['Server-Timing'] = (
+                f'db;dur={db_time * 1000:.2f};desc="{statements} queries", '
+                f'serialize;dur={serialize_time * 1000:.2f}, total;dur={elapsed * 1000:.2f}'
+            )
+        return response
+    
+    if app.config.get('METRICS_ENABLED', True):
+        token = app.config.get('METRICS_TOKEN') or ''
+        
+        @app.route('/metrics')
+        def metrics_endpoint():
+            # Timings and statement counts per route are not for the public;
+            # without a configured token nobody can read them
+            scheme, _, given = request.headers.get('Authorization', '').partition(' ')
+            if not token or scheme.lower() != 'bearer' or not hmac.compare_digest(given.encode(), token.encode()):
+                return Response('Unauthorized\n', status=401, mimetype='text/plain',
+                                headers={'WWW-Authenticate': 'Bearer'})
+            return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
+    return metrics
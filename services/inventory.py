@@ -0,0 +1,149 @@
+"""Atomic stock reservation and bulk catalog adjustments.
+
+Stock is decremented with a conditional UPDATE per product
+(``SET stock = stock - :q WHERE id = :id AND stock >= :q``) sent as one
+executemany batch, so the database checks and writes in a single step and a
+concurrent checkout can never drive stock negative. Products are always
+updated in ascending id order, so two checkouts locking overlapping products
+acquire the row locks in the same order and cannot deadlock. Admin restocks
+and price changes use the same pattern: one guarded executemany UPDATE per
+kind of change, with a diagnosing query only when a row was rejected.
+"""
+from datetime import datetime
+from sqlalchemy import update, bindparam, func
+from models.database import db
+from models.product import Product
+
+class InsufficientStock(Exception):
+    """Raised when a reservation cannot be satisfied; the caller rolls back."""
+    
+    def __init__(self, product_id):
+        super().__init__(f'Insufficient stock for product {product_id}')
+        self.product_id = product_id
+
+class UnknownProducts(Exception):
+    """Raised when an adjustment names products that don't exist."""
+    
+    def __init__(self, product_ids):
+        super().__init__(f"Products not found: {', '.join(map(str, product_ids))}")
+        self.product_ids = product_ids
+
+_products = Product.__table__
+
+_reserve = update(_products).where(
+    _products.c.id == bindparam('product_id'),
+    _products.c.is_active == True,
+    _products.c.stock_quantity >= bindparam('quantity')
+).values(
+    stock_quantity=_products.c.stock_quantity - bindparam('quantity'),
+    updated_at=bindparam('now')
+)
+
+_current_stock = func.coalesce(_products.c.stock_quantity, 0)
+
+_adjust = update(_products).where(
+    _products.c.id == bindparam('product_id'),
+    _current_stock + bindparam('delta') >= 0
+).values(
+    stock_quantity=_current_stock + bindparam('delta'),
+    updated_at=bindparam('now')
+)
+
+_reprice = update(_products).where(
+    _products.c.id == bindparam('product_id')
+).values(
+    price=bindparam('new_price'),
+    updated_at=bindparam('now')
+)
+
+def _shortfall(lines):
+    """Pick a product to blame for a failed batch (slow path only).
+    
+    Missing or inactive products come first, then the first line whose
+    remaining stock is below its requested quantity.
+    """
+    ids = [line['product_id'] for line in lines]
+    stock = dict(
+        db.session.query(Product.id, Product.stock_quantity)
+        .filter(Product.id.in_(ids), Product.is_active == True)
+    )
+    for line in lines:
+        if line['product_id'] not in stock:
+            return line['product_id']
+    for line in lines:
+        if (stock[line['product_id']] or 0) < line['quantity']:
+            return line['product_id']
+    return ids[0]
+
+def reserve_stock(quantities):
+    """Atomically take ``quantities`` (``{product_id: quantity}``) out of stock.
+    
+    Runs inside the caller's transaction. Raises :class:`InsufficientStock`
+    naming a product that is short; the caller must roll back so any
+    decrements already applied by the batch are undone.
+    """
+    now = datetime.utcnow()
+    lines = [
+        {'product_id': product_id, 'quantity': quantity, 'now': now}
+        for product_id, quantity in sorted(quantities.items())
+        if quantity > 0
+    ]
+    if not lines:
+        return
+    
+    dialect = db.session.get_bind().dialect
+    if dialect.supports_sane_multi_rowcount:
+        result = db.session.execute(_reserve, lines)
+        if result.rowcount != len(lines):
+            raise InsufficientStock(_shortfall(lines))
+    else:
+        for line in lines:
+            if db.session.execute(_reserve, line).rowcount != 1:
+                raise InsufficientStock(line['product_id'])
+    
+    _expire_loaded(quantities, ['stock_quantity', 'updated_at'])
+
+def _expire_loaded(product_ids, attributes):
+    # Loaded Product objects still hold the values from before the UPDATE
+    for product in list(db.session.identity_map.values()):
+        if isinstance(product, Product) and product.id in product_ids:
+            db.session.expire(product, attributes)
+
+def adjust_products(stock_deltas, prices):
+    """Apply ``{product_id: delta}`` stock changes and ``{product_id: price}``.
+    
+    Runs inside the caller's transaction: one locking read of the affected
+    rows, then at most one UPDATE per kind of change. Raises
+    :class:`UnknownProducts` or :class:`InsufficientStock` (a delta would
+    take stock below zero) before writing anything.
+    """
+    ids = sorted(set(stock_deltas) | set(prices))
+    stock = dict(
+        db.session.query(Product.id, _current_stock)
+        .filter(Product.id.in_(ids))
+        .with_for_update()
+    )
+    missing = [product_id for product_id in ids if product_id not in stock]
+    if missing:
+        raise UnknownProducts(missing)
+    for product_id, delta in sorted(stock_deltas.items()):
+        if stock[product_id] + delta < 0:
+            raise InsufficientStock(product_id)
+    
+    now = datetime.utcnow()
+    if stock_deltas:
+        lines = [
+            {'product_id': product_id, 'delta': delta, 'now': now}
+            for product_id, delta in sorted(stock_deltas.items())
+        ]
+        result = db.session.execute(_adjust, lines)
+        # SQLite takes no row locks, so a checkout may have got in first
+        if db.session.get_bind().dialect.supports_sane_multi_rowcount and result.rowcount != len(lines):
+            raise InsufficientStock(min(lines, key=lambda line: line['delta'])['product_id'])
+    if prices:
+        db.session.execute(_reprice, [
+            {'product_id': product_id, 'new_price': price, 'now': now}
+            for product_id, price in sorted(prices.items())
+        ])
+    
+    _expire_loaded(ids, ['stock_quantity', 'price', 'updated_at'])
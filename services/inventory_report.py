@@ -0,0 +1,79 @@
+"""Inventory health: low and out-of-stock products with their sales velocity.
+
+A product is low on stock when ``stock_quantity`` is at or below its own
+``low_stock_threshold``, or ``LOW_STOCK_THRESHOLD`` when it has none. The
+report reads the highest threshold in use from its index, range-scans
+``ix_products_active_stock`` up to it and joins the ``daily_product_sales``
+rollup for the last ``days`` days, so its cost follows the number of low
+products rather than the size of the catalog or the order history.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import func, and_
+from models.database import db
+from models.analytics import DailyProductSales
+from models.product import Product
+
+def stock_threshold(default):
+    """SQL expression for a product's effective low-stock threshold."""
+    return func.coalesce(Product.low_stock_threshold, default)
+
+def _stock_bound(default):
+    highest = db.session.query(func.max(Product.low_stock_threshold)).scalar()
+    return max(default, highest or 0)
+
+def _cover_order(item):
+    cover = item['days_of_cover']
+    return (cover is None, cover or 0, item['stock_quantity'])
+
+def inventory_report(default_threshold, days=30, limit=50):
+    """Active products at or below their threshold, most urgent first.
+    
+    ``daily_velocity`` is units sold per day over the last ``days`` days
+    (today included) and ``days_of_cover`` is how long the stock lasts at
+    that rate; it is None for products that haven't sold. ``products`` holds
+    at most ``limit`` entries while the counts cover every low product.
+    """
+    # Rollup days are UTC dates of created_at, so "today" has to be UTC too
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    threshold = stock_threshold(default_threshold)
+    units_sold = func.coalesce(func.sum(DailyProductSales.quantity), 0)
+    rows = db.session.query(
+        Product.id, Product.name, Product.category_id, Product.stock_quantity,
+        threshold.label('threshold'), units_sold.label('units_sold')
+    ).outerjoin(DailyProductSales, and_(
+        DailyProductSales.product_id == Product.id, DailyProductSales.day >= since
+    )).filter(
+        Product.is_active == True,
+        Product.stock_quantity <= _stock_bound(default_threshold),
+        Product.stock_quantity <= threshold
+    ).group_by(Product.id).all()
+    
+    items = []
+    for row in rows:
+        velocity = int(row.units_sold) / days
+        stock = row.stock_quantity
+        if stock <= 0:
+            cover = 0
+        else:
+            cover = round(stock / velocity, 1) if velocity else None
+        items.append({
+            'product_id': row.id,
+            'name': row.name,
+            'category_id': row.category_id,
+            'stock_quantity': stock,
+            'low_stock_threshold': row.threshold,
+            'out_of_stock': stock <= 0,
+            'units_sold': int(row.units_sold),
+            'daily_velocity': round(velocity, 2),
+            'days_of_cover': cover
+        })
+    items.sort(key=_cover_order)
+    
+    return {
+        'threshold': default_threshold,
+        'days': days,
+        'low_stock': len(items),
+        'out_of_stock': sum(1 for item in items if item['out_of_stock']),
+        'products': items[:limit],
+        'truncated': len(items) > limit
+    }
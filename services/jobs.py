@@ -0,0 +1,268 @@
+"""Durable background job queue with an in-process worker pool.
+
+Handlers are registered with :func:`job` and queued with :func:`enqueue`,
+which adds a ``jobs`` row to the caller's session so the job is committed (or
+rolled back) together with the write that caused it and survives restarts.
+``JOB_WORKERS`` threads per process claim due jobs with a conditional UPDATE,
+so any number of processes can share the table without running a job twice.
+A handler runs in the same transaction that deletes its job row; a failure
+is retried with exponential backoff up to ``max_attempts`` and then kept
+with status ``failed``. Jobs left ``running`` by a crashed process are
+requeued once their lease expires; one worker per process sweeps for them
+every ``JOB_SWEEP_INTERVAL`` seconds rather than on every poll.
+"""
+import json
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from flask import current_app, g, has_app_context, has_request_context
+from sqlalchemy import update, func, event
+from models.database import db
+from models.job import Job
+
+EXTENSION_KEY = 'jobs'
+
+_handlers = {}
+
+def job(name, max_attempts=5):
+    """Register ``handler(**payload)`` as the job called ``name``."""
+    def register(handler):
+        _handlers[name] = (handler, max_attempts)
+        return handler
+    return register
+
+def enqueue(name, delay=0, **payload):
+    """Queue ``name`` in the current session; the caller commits."""
+    if name not in _handlers:
+        raise KeyError(f'Unknown job {name}')
+    row = Job(
+        name=name,
+        payload=json.dumps(payload),
+        max_attempts=_handlers[name][1],
+        run_at=datetime.utcnow() + timedelta(seconds=delay)
+    )
+    db.session.add(row)
+    db.session.info['jobs_enqueued'] = True
+    return row
+
+def backoff(attempts, base, cap):
+    """Seconds to wait before retrying a job that has failed ``attempts`` times."""
+    return min(base * 2 ** (attempts - 1), cap)
+
+class JobQueue:
+    """Worker pool and counters for one application."""
+    
+    def __init__(self, app):
+        self.app = app
+        self.workers = app.config.get('JOB_WORKERS', 2)
+        self.poll_interval = app.config.get('JOB_POLL_INTERVAL', 1.0)
+        self.lease = app.config.get('JOB_LEASE_SECONDS', 300)
+        self.backoff_base = app.config.get('JOB_BACKOFF_BASE', 2)
+        self.backoff_max = app.config.get('JOB_BACKOFF_MAX', 300)
+        self.sweep_interval = app.config.get('JOB_SWEEP_INTERVAL', 30)
+        self._next_sweep = 0
+        # Each commit that queued jobs wakes one idle worker, not all of them
+        self._wakeup = threading.Condition()
+        self._wakeups = 0
+        self._stopping = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.processed = {}
+        self.retried = {}
+        self.failed = {}
+    
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self.work, name=f'job-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def stop(self, timeout=5):
+        self._stopping.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+    
+    def wake(self):
+        with self._wakeup:
+            self._wakeups += 1
+            self._wakeup.notify()
+    
+    def _idle(self):
+        with self._wakeup:
+            if not self._wakeups and not self._stopping.is_set():
+                self._wakeup.wait(self.poll_interval)
+            self._wakeups = max(self._wakeups - 1, 0)
+    
+    def _count(self, counter, name):
+        with self._lock:
+            counter[name] = counter.get(name, 0) + 1
+    
+    def work(self):
+        """Run jobs until :meth:`stop` is called."""
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    worked = self.run_pending()
+            except Exception:
+                self.app.logger.exception('Job worker error')
+                worked = 0
+            if not worked:
+                self._idle()
+    
+    def run_pending(self, limit=10):
+        """Claim and run up to ``limit`` due jobs; returns how many ran."""
+        if self._sweep_due():
+            self._requeue_expired()
+        ran = 0
+        while ran < limit and not self._stopping.is_set():
+            job_id = self._claim()
+            if job_id is None:
+                break
+            self._execute(job_id)
+            ran += 1
+        return ran
+    
+    def _sweep_due(self):
+        # Only the first worker to find the sweep due runs it
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_sweep:
+                return False
+            self._next_sweep = now + self.sweep_interval
+            return True
+    
+    def _requeue_expired(self):
+        expired = datetime.utcnow() - timedelta(seconds=self.lease)
+        db.session.execute(
+            update(Job)
+            .where(Job.status == 'running', Job.locked_at < expired)
+            .values(status='queued', locked_at=None)
+        )
+        db.session.commit()
+    
+    def _claim(self):
+        now = datetime.utcnow()
+        candidates = [
+            job_id for job_id, in db.session.query(Job.id)
+            .filter(Job.status == 'queued', Job.run_at <= now)
+            .order_by(Job.run_at, Job.id)
+            .limit(5)
+        ]
+        for job_id in candidates:
+            claimed = db.session.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == 'queued')
+                .values(status='running', locked_at=now, attempts=Job.attempts + 1)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return job_id
+        db.session.commit()
+        return None
+    
+    def _execute(self, job_id):
+        row = db.session.get(Job, job_id)
+        name = row.name
+        entry = _handlers.get(name)
+        try:
+            if entry is None:
+                raise KeyError(f'Unknown job {name}')
+            entry[0](**json.loads(row.payload))
+            db.session.delete(row)
+            db.session.commit()
+            self._count(self.processed, name)
+        except Exception:
+            db.session.rollback()
+            self._fail(job_id, traceback.format_exc(limit=5))
+    
+    def _fail(self, job_id, error):
+        row = db.session.get(Job, job_id)
+        if row.attempts < row.max_attempts:
+            row.status = 'queued'
+            row.run_at = datetime.utcnow() + timedelta(
+                seconds=backoff(row.attempts, self.backoff_base, self.backoff_max)
+            )
+            self._count(self.retried, row.name)
+        else:
+            row.status = 'failed'
+            self._count(self.failed, row.name)
+            self.app.logger.error('Job %s (%s) failed after %d attempts', row.id, row.name, row.attempts)
+        row.locked_at = None
+        row.last_error = error[-4000:]
+        db.session.commit()
+    
+    def stats(self):
+        """Queue depth by status plus this process's counters."""
+        depth = dict(db.session.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+        oldest = db.session.query(func.min(Job.run_at)).filter(
+            Job.status == 'queued', Job.run_at <= datetime.utcnow()
+        ).scalar()
+        with self._lock:
+            counters = {
+                'processed': dict(self.processed),
+                'retried': dict(self.retried),
+                'failed': dict(self.failed)
+            }
+        return {
+            'depth': {status: depth.get(status, 0) for status in ('queued', 'running', 'failed')},
+            'oldest_due_seconds': (datetime.utcnow() - oldest).total_seconds() if oldest else 0,
+            'workers': len(self._threads),
+            'counters': counters
+        }
+    
+    def metric_lines(self):
+        stats = self.stats()
+        lines = ['# HELP job_queue_depth Jobs in the queue table by status.', '# TYPE job_queue_depth gauge']
+        lines += [f'job_queue_depth{{status="{status}"}} {count}' for status, count in stats['depth'].items()]
+        lines += [
+            '# HELP job_queue_oldest_due_seconds Age of the oldest job that is due but not yet claimed.',
+            '# TYPE job_queue_oldest_due_seconds gauge',
+            f"job_queue_oldest_due_seconds {stats['oldest_due_seconds']:.3f}"
+        ]
+        for counter in ('processed', 'retried', 'failed'):
+            name = f'jobs_{counter}_total'
+            lines += [f'# HELP {name} Jobs {counter} by this process.', f'# TYPE {name} counter']
+            lines += [f'{name}{{job="{job_name}"}} {count}' for job_name, count in sorted(stats['counters'][counter].items())]
+        return lines
+
+def _wake_current_queue():
+    queue = current_app.extensions.get(EXTENSION_KEY)
+    if queue is not None:
+        queue.wake()
+
+# Registered once per process: db.session is shared by every app, so the
+# listener wakes the queue of whichever app committed
+@event.listens_for(db.session, 'after_commit')
+def _wake_workers(session):
+    if not session.info.pop('jobs_enqueued', False) or not has_app_context():
+        return
+    if has_request_context():
+        # A worker woken now would take the GIL and the write lock while the
+        # response is still being built; wake it once the request is done
+        g.wake_jobs = True
+    else:
+        _wake_current_queue()
+
+def _wake_after_request(exc):
+    if g.pop('wake_jobs', False):
+        _wake_current_queue()
+
+def init_jobs(app):
+    queue = JobQueue(app)
+    app.extensions[EXTENSION_KEY] = queue
+    app.teardown_request(_wake_after_request)
+    
+    metrics = app.extensions.get('instrumentation')
+    if metrics is not None:
+        metrics.collectors.append(queue.metric_lines)
+    
+    if queue.workers > 0:
+        queue.start()
+    return queue
+
+def job_queue():
+    return current_app.extensions[EXTENSION_KEY]
@@ -0,0 +1,57 @@
+"""Pluggable JSON provider with an orjson fast path.
+
+``JSON_PROVIDER`` selects the encoder: ``orjson``, ``stdlib`` (Flask's
+default) or ``auto`` (orjson when it is installed). The orjson provider keeps
+Flask's conventions (keys sorted, datetimes as HTTP dates, Decimals as
+strings, pretty-printed output in debug mode) but its documents differ in a
+few ways: NaN and infinities are written as ``null`` where Flask writes the
+non-standard ``NaN``/``Infinity``, non-ASCII text is written as UTF-8 rather
+than ``\\u`` escapes, and floats use the shortest form (``1e16``, not
+``1e+16``). Documents orjson refuses, such as integers beyond 64 bits, are
+encoded by Flask's provider instead.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Encode with orjson; decoding stays with the stdlib parser."""
+    
+    _options = 0 if orjson is None else (
+        orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+    
+    def _dump_bytes(self, obj, indent=False):
+        options = self._options | (orjson.OPT_INDENT_2 if indent else 0)
+        # Types orjson doesn't handle natively go through Flask's own conversions
+        return orjson.dumps(obj, default=self.default, option=options)
+    
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._dump_bytes(obj).decode()
+        except orjson.JSONEncodeError:
+            return super().dumps(obj)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        try:
+            body = self._dump_bytes(obj, indent)
+        except orjson.JSONEncodeError:
+            return super().response(*args, **kwargs)
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+def init_json(app):
+    """Install the provider named by ``JSON_PROVIDER`` on ``app``."""
+    choice = app.config.get('JSON_PROVIDER', 'auto')
+    if choice == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVIDER=orjson but orjson is not installed')
+    if choice == 'orjson' or (choice == 'auto' and orjson is not None):
+        app.json = OrjsonProvider(app)
+    return app.json
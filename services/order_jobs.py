@@ -0,0 +1,45 @@
+"""Background work that follows checkout and order status changes.
+
+The routes call :func:`order_placed` / :func:`order_status_changed` before
+committing, so the jobs are queued atomically with the order write and the
+rollup and stock-alert work stays out of the request.
+"""
+from flask import current_app
+from models.database import db
+from models.order import Order, OrderItem
+from models.product import Product
+from services.jobs import job, enqueue
+from services.sales_rollup import record_order, record_status_change
+from services.inventory_report import stock_threshold
+
+def order_placed(order_id, product_ids):
+    enqueue('record_order_rollup', order_id=order_id, status='pending')
+    enqueue('low_stock_alert', product_ids=sorted(product_ids))
+
+def order_status_changed(order_id, old_status, new_status):
+    if old_status != new_status:
+        enqueue('record_status_change_rollup', order_id=order_id, old_status=old_status, new_status=new_status)
+
+@job('record_order_rollup')
+def record_order_rollup(order_id, status):
+    order = db.session.get(Order, order_id)
+    if order is None:
+        return
+    items = db.session.query(OrderItem.product_id, OrderItem.quantity, OrderItem.price).filter_by(order_id=order_id)
+    # The status the order was placed with; later changes have their own jobs
+    record_order(order, items, status=status)
+
+@job('record_status_change_rollup')
+def record_status_change_rollup(order_id, old_status, new_status):
+    order = db.session.get(Order, order_id)
+    if order is not None:
+        record_status_change(order, old_status, new_status)
+
+@job('low_stock_alert', max_attempts=3)
+def low_stock_alert(product_ids):
+    threshold = current_app.config.get('LOW_STOCK_THRESHOLD', 10)
+    low = db.session.query(Product.id, Product.name, Product.stock_quantity).filter(
+        Product.id.in_(product_ids), Product.stock_quantity <= stock_threshold(threshold)
+    )
+    for product_id, name, stock in low:
+        current_app.logger.warning('Low stock: product %s (%s) has %s left', product_id, name, stock)
@@ -0,0 +1,105 @@
+"""Page-number and keyset (cursor) pagination for list endpoints.
+
+Passing a ``cursor`` query parameter (empty for the first page) switches an
+endpoint from OFFSET paging to keyset paging: the next page is selected with a
+``WHERE (key) < (last seen key)`` predicate, so each page costs a bounded
+index range scan at any depth and no COUNT(*) unless ``include_total`` is set.
+"""
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+from flask import request
+from sqlalchemy import and_, or_
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor token we did not issue."""
+
+def _flag(name, default):
+    value = request.args.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes')
+
+def encode_cursor(values):
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def _cursor_value(column, value):
+    """Check a decoded cursor value against its column's type; raises ValueError."""
+    python_type = column.type.python_type
+    if python_type is datetime:
+        if not isinstance(value, str):
+            raise ValueError(f'{column.key} must be a timestamp')
+        return datetime.fromisoformat(value)
+    if isinstance(value, bool) or value is None:
+        raise ValueError(f'{column.key} has the wrong type')
+    if python_type in (float, Decimal) and isinstance(value, (int, float)):
+        return value
+    if not isinstance(value, python_type):
+        raise ValueError(f'{column.key} has the wrong type')
+    return value
+
+def decode_cursor(token, columns):
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise InvalidCursor(token)
+        return [_cursor_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(token) from e
+
+def _after(columns, values, descending):
+    """Row-value comparison ``(c1, c2, ...) > (v1, v2, ...)`` spelled out portably."""
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [columns[j] == values[j] for j in range(i)]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+def paginate_listing(query, key_columns, descending=False):
+    """Paginate ``query`` from the request args.
+    
+    ``key_columns`` must identify rows uniquely (end with the primary key).
+    Returns ``(items, meta)`` where ``meta`` holds the paging fields to merge
+    into the JSON response.
+    """
+    per_page = request.args.get('per_page', 20, type=int)
+    ordering = [column.desc() if descending else column.asc() for column in key_columns]
+    
+    cursor = request.args.get('cursor')
+    if cursor is None:
+        # Keys only break ties here, so an existing ordering such as search rank wins
+        query = query.order_by(*ordering)
+        page = request.args.get('page', 1, type=int)
+        include_total = _flag('include_total', True)
+        result = query.paginate(page=page, per_page=per_page, error_out=False, count=include_total)
+        return result.items, {
+            'total': result.total,
+            'pages': result.pages if include_total else None,
+            'current_page': page
+        }
+    
+    # Keyset paging must walk the rows in key order; a page holds at least one row
+    per_page = max(per_page, 1)
+    query = query.order_by(None).order_by(*ordering)
+    
+    meta = {}
+    if _flag('include_total', False):
+        meta['total'] = query.order_by(None).count()
+    
+    if cursor:
+        query = query.filter(_after(key_columns, decode_cursor(cursor, key_columns), descending))
+    
+    items = query.limit(per_page + 1).all()
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    
+    meta['has_more'] = has_more
+    meta['next_cursor'] = encode_cursor(
+        [getattr(items[-1], column.key) for column in key_columns]
+    ) if has_more else None
+    return items, meta
@@ -0,0 +1,103 @@
+"""Password hashing with configurable parameters on a bounded worker pool.
+
+Hashes are Werkzeug's ``method$salt$hash`` strings, made with
+``PASSWORD_HASH_METHOD`` and ``PASSWORD_SALT_LENGTH``. A stored hash made
+with other parameters still verifies, and :meth:`PasswordHasher.needs_rehash`
+tells login to replace it, so changing the parameters upgrades each account
+on its next successful login. Hashing and verification run on
+``PASSWORD_HASH_WORKERS`` threads (hashlib releases the GIL while it works),
+with at most ``PASSWORD_HASH_QUEUE`` more calls waiting; beyond that a call
+fails at once with :class:`PasswordHasherBusy` instead of piling up CPU work
+behind a burst of logins.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+EXTENSION_KEY = 'password_hasher'
+
+# Werkzeug's defaults for the parameters a method string may leave out
+_METHOD_DEFAULTS = {'pbkdf2': ('sha256', '600000'), 'scrypt': ('32768', '8', '1')}
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool is full; the caller should answer 503."""
+
+def full_method(method):
+    """``method`` with Werkzeug's defaults filled in, as it appears in stored hashes."""
+    name, *params = method.split(':')
+    defaults = _METHOD_DEFAULTS.get(name)
+    if defaults is None or len(params) > len(defaults):
+        raise RuntimeError(f'Unsupported PASSWORD_HASH_METHOD {method!r}; use pbkdf2[:hash[:iterations]] or scrypt[:n[:r[:p]]]')
+    return ':'.join([name, *params, *defaults[len(params):]])
+
+class PasswordHasher:
+    """Hashes and verifies passwords; ``workers`` of 0 runs them on the calling thread."""
+    
+    def __init__(self, method, salt_length=16, workers=1, queue_size=8, timeout=5.0):
+        self.method = full_method(method)
+        self.salt_length = salt_length
+        self.timeout = timeout
+        self._executor = None
+        if workers > 0:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + queue_size)
+        self._lock = threading.Lock()
+        self.rejected = 0
+    
+    def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy('Password hashing is saturated')
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy('Password hashing timed out')
+    
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+    
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+    
+    def needs_rehash(self, pwhash):
+        """Whether ``pwhash`` was made with other parameters than the configured ones."""
+        method, _, rest = pwhash.partition('$')
+        salt = rest.partition('$')[0]
+        return method != self.method or len(salt) != self.salt_length
+    
+    def metric_lines(self):
+        return [
+            '# HELP password_hash_rejected_total Hash or verify calls refused because the pool was full or slow.',
+            '# TYPE password_hash_rejected_total counter',
+            f'password_hash_rejected_total {self.rejected}'
+        ]
+
+def init_passwords(app):
+    hasher = PasswordHasher(
+        app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000'),
+        salt_length=app.config.get('PASSWORD_SALT_LENGTH', 16),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 1),
+        queue_size=app.config.get('PASSWORD_HASH_QUEUE', 8),
+        timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 5.0)
+    )
+    app.extensions[EXTENSION_KEY] = hasher
+    
+    metrics = app.extensions.get('instrumentation')
+    if metrics is not None:
+        metrics.collectors.append(hasher.metric_lines)
+    return hasher
+
+def password_hasher():
+    return current_app.extensions[EXTENSION_KEY]
@@ -0,0 +1,117 @@
+"""In-memory sliding-window limits for login attempts.
+
+:class:`SlidingWindowLimiter` keeps, per key, the times of the last
+``limit`` events and refuses a key while ``limit`` of them fall inside the
+last ``window`` seconds. :class:`LoginThrottle` applies one limiter to failed
+logins per client IP and another per username, and is consulted before the
+user lookup or any password hashing, so a credential-stuffing burst is turned
+away for the price of a dictionary lookup. Limits are per process.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from flask import current_app
+
+EXTENSION_KEY = 'login_throttle'
+
+class SlidingWindowLimiter:
+    """At most ``limit`` events per key in any ``window`` seconds; ``maxkeys`` bounds memory (LRU)."""
+    
+    def __init__(self, limit, window, maxkeys=100000, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.maxkeys = maxkeys
+        self._clock = clock
+        self._events = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def retry_after(self, key):
+        """Seconds until ``key`` may act again, or 0 when it may act now."""
+        if self.limit <= 0:
+            return 0
+        with self._lock:
+            events = self._events.get(key)
+            if events is None or len(events) < self.limit:
+                return 0
+            return max(0, events[0] + self.window - self._clock())
+    
+    def record(self, key):
+        if self.limit <= 0:
+            return
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                events = self._events[key] = deque(maxlen=self.limit)
+            events.append(self._clock())
+            self._events.move_to_end(key)
+            while len(self._events) > self.maxkeys:
+                self._events.popitem(last=False)
+    
+    def reset(self, key):
+        with self._lock:
+            self._events.pop(key, None)
+    
+    def __len__(self):
+        return len(self._events)
+
+class LoginThrottle:
+    """Failed-login limits per client IP and per username."""
+    
+    def __init__(self, per_ip, per_user, window, maxkeys=100000, enabled=True):
+        self.enabled = enabled
+        self.by_ip = SlidingWindowLimiter(per_ip, window, maxkeys)
+        self.by_user = SlidingWindowLimiter(per_user, window, maxkeys)
+        self._lock = threading.Lock()
+        self.throttled = 0
+    
+    @staticmethod
+    def _user_key(username):
+        return str(username).strip().lower()
+    
+    def retry_after(self, ip, username):
+        """Seconds the client must wait before this attempt is allowed; 0 to go ahead."""
+        if not self.enabled:
+            return 0
+        wait = max(self.by_ip.retry_after(ip), self.by_user.retry_after(self._user_key(username)))
+        if wait:
+            with self._lock:
+                self.throttled += 1
+        return wait
+    
+    def failed(self, ip, username):
+        if self.enabled:
+            self.by_ip.record(ip)
+            self.by_user.record(self._user_key(username))
+    
+    def succeeded(self, username):
+        """Clear the username's failures; the IP's stay, since one IP may try many accounts."""
+        if self.enabled:
+            self.by_user.reset(self._user_key(username))
+    
+    def metric_lines(self):
+        return [
+            '# HELP login_throttled_total Login attempts refused by the failed-login limits.',
+            '# TYPE login_throttled_total counter',
+            f'login_throttled_total {self.throttled}',
+            '# HELP login_throttle_keys IPs and usernames with recent failed logins.',
+            '# TYPE login_throttle_keys gauge',
+            f'login_throttle_keys {len(self.by_ip) + len(self.by_user)}'
+        ]
+
+def init_login_throttle(app):
+    throttle = LoginThrottle(
+        per_ip=app.config.get('LOGIN_MAX_FAILURES_PER_IP', 20),
+        per_user=app.config.get('LOGIN_MAX_FAILURES_PER_USER', 5),
+        window=app.config.get('LOGIN_FAILURE_WINDOW', 300),
+        maxkeys=app.config.get('LOGIN_THROTTLE_KEYS', 100000),
+        enabled=app.config.get('LOGIN_THROTTLE', True)
+    )
+    app.extensions[EXTENSION_KEY] = throttle
+    
+    metrics = app.extensions.get('instrumentation')
+    if metrics is not None:
+        metrics.collectors.append(throttle.metric_lines)
+    return throttle
+
+def login_throttle():
+    return current_app.extensions[EXTENSION_KEY]
@@ -0,0 +1,228 @@
+"""Incremental daily sales rollups backing the admin sales analytics.
+
+Checkout and order status updates queue jobs (see :mod:`services.order_jobs`)
+that apply small deltas to the rollup tables shortly after the order write,
+so a date range query only has to sum pre-aggregated rows. Partial days at
+the edges of a range are still read from the raw order tables so results
+match the original per-order semantics.
+"""
+from datetime import datetime, date, time, timedelta
+from decimal import Decimal
+from sqlalchemy import func, insert, update, bindparam
+from models.database import db
+from models.analytics import DailySalesSummary, DailyProductSales
+from models.order import Order, OrderItem
+from models.product import Product
+from services.analytics import status_breakdown, product_breakdown
+
+TOP_PRODUCTS_LIMIT = 10
+
+def _to_decimal(value):
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value or 0))
+
+def _to_date(value):
+    # func.date() comes back as a string on SQLite and a date on MySQL
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+_summary = DailySalesSummary.__table__
+_product_sales = DailyProductSales.__table__
+
+# Deltas are applied with UPDATE ... SET x = x + :delta so concurrent job
+# workers never overwrite each other's increments
+_add_product_sales = update(_product_sales).where(
+    _product_sales.c.day == bindparam('row_day'),
+    _product_sales.c.product_id == bindparam('row_product_id')
+).values(
+    quantity=_product_sales.c.quantity + bindparam('add_quantity'),
+    revenue=_product_sales.c.revenue + bindparam('add_revenue'),
+    updated_at=bindparam('now')
+)
+
+def _bump_status(day, status, orders, revenue):
+    updated = db.session.execute(
+        update(_summary)
+        .where(_summary.c.day == day, _summary.c.status == status)
+        .values(
+            order_count=_summary.c.order_count + orders,
+            revenue=_summary.c.revenue + revenue,
+            updated_at=datetime.utcnow()
+        )
+    ).rowcount
+    if not updated:
+        # A concurrent first insert for this day fails the unique constraint;
+        # the job is retried and then takes the UPDATE path
+        db.session.execute(insert(_summary).values(
+            day=day, status=status, order_count=orders, revenue=revenue, updated_at=datetime.utcnow()
+        ))
+
+def record_order(order, items, status=None):
+    """Add a freshly created order to the rollups.
+    
+    ``items`` is an iterable of ``(product_id, quantity, unit_price)`` tuples so
+    callers don't need to reload ``order.order_items``. ``status`` overrides
+    ``order.status`` when the order may have moved on since it was placed.
+    The caller commits.
+    """
+    day = (order.created_at or datetime.utcnow()).date()
+    _bump_status(day, status or order.status or 'pending', 1, _to_decimal(order.total_amount))
+    
+    totals = {}
+    for product_id, quantity, price in items:
+        qty, revenue = totals.get(product_id, (0, Decimal('0')))
+        totals[product_id] = (qty + quantity, revenue + _to_decimal(price) * quantity)
+    
+    if not totals:
+        return
+    
+    now = datetime.utcnow()
+    existing = {
+        product_id for product_id, in db.session.query(DailyProductSales.product_id).filter(
+            DailyProductSales.day == day,
+            DailyProductSales.product_id.in_(list(totals))
+        )
+    }
+    increments = [
+        {'row_day': day, 'row_product_id': product_id, 'add_quantity': quantity, 'add_revenue': revenue, 'now': now}
+        for product_id, (quantity, revenue) in sorted(totals.items())
+        if product_id in existing
+    ]
+    new_rows = [
+        {'day': day, 'product_id': product_id, 'quantity': quantity, 'revenue': revenue, 'updated_at': now}
+        for product_id, (quantity, revenue) in sorted(totals.items())
+        if product_id not in existing
+    ]
+    if increments:
+        db.session.execute(_add_product_sales, increments)
+    # First sales of the day for these products go in as one bulk insert
+    if new_rows:
+        db.session.execute(insert(_product_sales), new_rows)
+
+def record_status_change(order, old_status, new_status):
+    """Move an order between status buckets. The caller commits."""
+    if old_status == new_status:
+        return
+    day = (order.created_at or datetime.utcnow()).date()
+    amount = _to_decimal(order.total_amount)
+    _bump_status(day, old_status or 'pending', -1, -amount)
+    _bump_status(day, new_status, 1, amount)
+
+def rebuild_sales_rollups():
+    """Recompute every rollup row from the raw order tables."""
+    DailySalesSummary.query.delete()
+    DailyProductSales.query.delete()
+    
+    order_day = func.date(Order.created_at)
+    status_rows = db.session.query(
+        order_day, Order.status, func.count(Order.id), func.sum(Order.total_amount)
+    ).group_by(order_day, Order.status)
+    db.session.add_all(
+        DailySalesSummary(day=_to_date(day), status=status or 'pending', order_count=count, revenue=_to_decimal(revenue))
+        for day, status, count, revenue in status_rows
+    )
+    
+    product_rows = db.session.query(
+        order_day, OrderItem.product_id,
+        func.sum(OrderItem.quantity), func.sum(OrderItem.price * OrderItem.quantity)
+    ).join(Order, Order.id == OrderItem.order_id).group_by(order_day, OrderItem.product_id)
+    db.session.add_all(
+        DailyProductSales(day=_to_date(day), product_id=product_id, quantity=quantity, revenue=_to_decimal(revenue))
+        for day, product_id, quantity, revenue in product_rows
+    )
+    
+    db.session.commit()
+
+def _split_range(start, end):
+    """Split [start, end] into whole days served by rollups and raw edge windows.
+    
+    Returns ``(first_day, last_day, edges)`` where the rollup covers
+    ``first_day..last_day`` inclusive (either may be None for an open range)
+    and ``edges`` is a list of ``(lower, upper, upper_inclusive)`` windows.
+    """
+    first_day = None
+    if start is not None:
+        first_day = start.date() if start.time() == time.min else start.date() + timedelta(days=1)
+    last_day = None
+    if end is not None:
+        last_day = end.date() - timedelta(days=1)
+    
+    if first_day is not None and last_day is not None and first_day > last_day:
+        return None, None, [(start, end, True)]
+    
+    edges = []
+    if start is not None and start.time() != time.min:
+        edges.append((start, datetime.combine(first_day, time.min), False))
+    if end is not None:
+        edges.append((datetime.combine(end.date(), time.min), end, True))
+    return first_day, last_day, edges
+
+def _raw_window(lower, upper, upper_inclusive):
+    return (
+        status_breakdown(lower, upper, upper_inclusive).all(),
+        product_breakdown(lower, upper, upper_inclusive).all()
+    )
+
+def _rollup_window(first_day, last_day):
+    status_query = db.session.query(
+        DailySalesSummary.status,
+        func.sum(DailySalesSummary.order_count), func.sum(DailySalesSummary.revenue)
+    )
+    product_query = db.session.query(
+        DailyProductSales.product_id,
+        func.sum(DailyProductSales.quantity), func.sum(DailyProductSales.revenue)
+    )
+    if first_day is not None:
+        status_query = status_query.filter(DailySalesSummary.day >= first_day)
+        product_query = product_query.filter(DailyProductSales.day >= first_day)
+    if last_day is not None:
+        status_query = status_query.filter(DailySalesSummary.day <= last_day)
+        product_query = product_query.filter(DailyProductSales.day <= last_day)
+    
+    statuses = status_query.group_by(DailySalesSummary.status).all()
+    products = product_query.group_by(DailyProductSales.product_id).all()
+    return statuses, products
+
+def sales_summary(start=None, end=None):
+    """Sales analytics for orders created in ``[start, end]``."""
+    first_day, last_day, edges = _split_range(start, end)
+    
+    windows = [] if (first_day is None and last_day is None and edges) else [_rollup_window(first_day, last_day)]
+    windows.extend(_raw_window(*edge) for edge in edges)
+    
+    status_counts = {}
+    total_revenue = Decimal('0')
+    product_sales = {}
+    for statuses, products in windows:
+        for status, count, revenue in statuses:
+            status_counts[status] = status_counts.get(status, 0) + int(count or 0)
+            total_revenue += _to_decimal(revenue)
+        for product_id, quantity, revenue in products:
+            qty, rev = product_sales.get(product_id, (0, Decimal('0')))
+            product_sales[product_id] = (qty + int(quantity or 0), rev + _to_decimal(revenue))
+    
+    status_counts = {status: count for status, count in status_counts.items() if count}
+    total_orders = sum(status_counts.values())
+    
+    top = sorted(product_sales.items(), key=lambda x: x[1][1], reverse=True)[:TOP_PRODUCTS_LIMIT]
+    names = dict(
+        db.session.query(Product.id, Product.name).filter(Product.id.in_([pid for pid, _ in top]))
+    ) if top else {}
+    
+    total_revenue = float(total_revenue)
+    return {
+        'total_orders': total_orders,
+        'total_revenue': total_revenue,
+        'average_order_value': total_revenue / total_orders if total_orders > 0 else 0,
+        'orders_by_status': status_counts,
+        'top_products': [
+            {
+                'name': names.get(product_id, f"Product {product_id}"),
+                'quantity': quantity,
+                'revenue': float(revenue)
+            }
+            for product_id, (quantity, revenue) in top
+        ]
+    }
@@ -0,0 +1,122 @@
+"""Full-text product search.
+
+On SQLite the catalog is mirrored into an FTS5 external-content table kept in
+sync by triggers; on MySQL a FULLTEXT index over name and description is used.
+Both rank matches by relevance and treat the last search word as a prefix so
+the storefront search box works as type-ahead. Other databases (or SQLite
+builds without FTS5) fall back to the original ``LIKE '%term%'`` filter.
+"""
+import re
+from flask import current_app
+from sqlalchemy import text, select, literal_column
+from models.database import db
+from models.product import Product
+
+EXTENSION_KEY = 'product_search'
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+_SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, content='products', content_rowid='id', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+]
+
+_MYSQL_INDEX = 'ft_products_name_description'
+
+def _init_sqlite(connection):
+    exists = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+    ).first()
+    for statement in _SQLITE_DDL:
+        connection.execute(text(statement))
+    if not exists:
+        # Index whatever the catalog already holds
+        connection.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+
+def _init_mysql(connection):
+    exists = connection.execute(
+        text(
+            "SELECT 1 FROM information_schema.statistics "
+            "WHERE table_schema = DATABASE() AND table_name = 'products' AND index_name = :name"
+        ),
+        {'name': _MYSQL_INDEX}
+    ).first()
+    if not exists:
+        connection.execute(text(f"ALTER TABLE products ADD FULLTEXT INDEX {_MYSQL_INDEX} (name, description)"))
+
+def init_search(app):
+    """Create the search index for the configured database, if supported."""
+    backend = None
+    dialect = db.engine.dialect.name
+    try:
+        with db.engine.begin() as connection:
+            if dialect == 'sqlite':
+                _init_sqlite(connection)
+                backend = 'fts5'
+            elif dialect == 'mysql':
+                _init_mysql(connection)
+                backend = 'mysql'
+    except Exception as e:
+        app.logger.warning('Full-text search unavailable, falling back to LIKE: %s', e)
+        backend = None
+    app.extensions[EXTENSION_KEY] = backend
+    return backend
+
+def rebuild_search_index():
+    """Re-index every product (SQLite only; MySQL maintains FULLTEXT itself)."""
+    if current_app.extensions.get(EXTENSION_KEY) == 'fts5':
+        db.session.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+        db.session.commit()
+
+def _terms(search):
+    return _WORD.findall(search.lower())
+
+def _fts5_query(words):
+    # Quote every word so user input can't inject FTS syntax; prefix-match the last
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+def _mysql_query(words):
+    terms = [f'+{word}' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+def apply_search(query, search):
+    """Filter a ``Product`` query to matches for ``search``, best matches first."""
+    backend = current_app.extensions.get(EXTENSION_KEY)
+    words = _terms(search)
+    
+    if backend is None or not words:
+        return query.filter(Product.name.contains(search))
+    
+    if backend == 'fts5':
+        matches = select(
+            literal_column('rowid').label('product_id'),
+            literal_column('bm25(products_fts, 10.0, 1.0)').label('rank')
+        ).select_from(text('products_fts')).where(
+            text('products_fts MATCH :search_terms').bindparams(search_terms=_fts5_query(words))
+        ).subquery('product_search')
+        return query.join(matches, matches.c.product_id == Product.id).order_by(matches.c.rank)
+    
+    terms = _mysql_query(words)
+    return query.filter(
+        text('MATCH (products.name, products.description) AGAINST (:search_terms IN BOOLEAN MODE)')
+        .bindparams(search_terms=terms)
+    ).order_by(
+        text('MATCH (products.name, products.description) AGAINST (:search_rank IN BOOLEAN MODE) DESC')
+        .bindparams(search_rank=terms)
+    )
@@ -0,0 +1,91 @@
+"""Column-projected serializers for the list endpoints.
+
+They build the same dicts as the models' ``to_dict`` directly from query
+rows, so a listing page selects only the columns it returns and never
+hydrates ORM objects or lazy-loads their relationships. Project a filtered
+model query with :func:`project_products` / :func:`project_orders` and
+paginate it as usual; the rows keep the ``id`` and ``created_at`` names the
+cursor pagination reads.
+"""
+from models.database import db
+from models.product import Product, Category
+from models.order import Order, OrderItem
+from services.instrumentation import timed_serialization
+
+PRODUCT_COLUMNS = (
+    Product.id, Product.name, Product.description, Product.price, Product.category_id,
+    Category.name.label('category_name'), Product.stock_quantity, Product.image_url,
+    Product.is_active, Product.created_at, Product.updated_at
+)
+
+ORDER_COLUMNS = (
+    Order.id, Order.user_id, Order.total_amount, Order.status, Order.shipping_address,
+    Order.created_at, Order.updated_at
+)
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+def project_products(query):
+    return query.with_entities(*PRODUCT_COLUMNS).outerjoin(Category, Category.id == Product.category_id)
+
+@timed_serialization
+def product_rows(rows):
+    """``Product.to_dict()`` for each projected row."""
+    return [
+        {
+            'id': row.id,
+            'name': row.name,
+            'description': row.description,
+            'price': float(row.price),
+            'category_id': row.category_id,
+            'category_name': row.category_name,
+            'stock_quantity': row.stock_quantity,
+            'image_url': row.image_url,
+            'is_active': row.is_active,
+            'created_at': _isoformat(row.created_at)
+        }
+        for row in rows
+    ]
+
+def project_orders(query):
+    return query.with_entities(*ORDER_COLUMNS)
+
+def order_rows(rows):
+    """``Order.to_dict()`` for each projected row, items fetched in one query."""
+    order_ids = [row.id for row in rows]
+    items = []
+    if order_ids:
+        items = db.session.query(
+            OrderItem.id, OrderItem.order_id, OrderItem.product_id, Product.name,
+            OrderItem.quantity, OrderItem.price
+        ).outerjoin(Product, Product.id == OrderItem.product_id).filter(
+            OrderItem.order_id.in_(order_ids)
+        ).order_by(OrderItem.id).all()
+    return _order_dicts(rows, items)
+
+@timed_serialization
+def _order_dicts(rows, items):
+    by_order = {}
+    for item_id, order_id, product_id, product_name, quantity, price in items:
+        by_order.setdefault(order_id, []).append({
+            'id': item_id,
+            'order_id': order_id,
+            'product_id': product_id,
+            'product_name': product_name,
+            'quantity': quantity,
+            'price': float(price)
+        })
+    return [
+        {
+            'id': row.id,
+            'user_id': row.user_id,
+            'total_amount': float(row.total_amount),
+            'status': row.status,
+            'shipping_address': row.shipping_address,
+            'created_at': _isoformat(row.created_at),
+            'updated_at': _isoformat(row.updated_at),
+            'order_items': by_order.get(row.id, [])
+        }
+        for row in rows
+    ]
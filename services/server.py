@@ -0,0 +1,35 @@
+"""Production HTTP serving for ``flask serve``.
+
+Gunicorn runs ``workers`` processes with ``threads`` threads each. Every
+worker builds its own app after the fork, so engines, caches and job worker
+threads are never shared across processes. Where gunicorn is unavailable
+(Windows) waitress serves the app from one process with ``workers * threads``
+threads.
+"""
+
+def serve(app_factory, bind, workers, threads, timeout):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        BaseApplication = None
+    
+    if BaseApplication is None:
+        try:
+            from waitress import serve as waitress_serve
+        except ImportError:
+            raise RuntimeError('Install gunicorn (Linux/macOS) or waitress (Windows) to use `flask serve`')
+        waitress_serve(app_factory(), listen=bind, threads=workers * threads, channel_timeout=timeout)
+        return
+    
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', bind)
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread' if threads > 1 else 'sync')
+            self.cfg.set('timeout', timeout)
+        
+        def load(self):
+            return app_factory()
+    
+    Server().run()
@@ -0,0 +1,10 @@
+"""WSGI entry point for running under an external server, e.g.
+    
+    gunicorn -w 4 --threads 4 -b 0.0.0.0:5000 wsgi:app
+
+Don't use ``--preload``: each worker must create the app itself so it gets
+its own database connections and background job threads.
+"""
+from app import create_app
+
+app = create_app()